@@ -0,0 +1,54 @@
+"""
+Микро-бенчмарк накладных расходов CallableObject.call.
+
+Запуск: python -m benchmarks.callable_object
+"""
+import asyncio
+import time
+
+from core.handlers.execution import inline
+from core.handlers.handler import CallableObject, FilterObject, HandlerObject
+
+ITERATIONS = 200_000
+CONTEXT = {'event_router': object(), 'handler': object(), 'state': 1}
+
+
+async def only_event(event):
+    pass
+
+
+async def with_state(event, state):
+    pass
+
+
+async def with_kwargs(event, **kwargs):
+    pass
+
+
+async def measure(name, call):
+    started = time.perf_counter()
+    for _ in range(ITERATIONS):
+        await call()
+    elapsed = time.perf_counter() - started
+    print(f"{name:<32} {elapsed / ITERATIONS * 1e9:>8.0f} ns/call")
+
+
+async def main():
+    event = object()
+
+    await measure("direct await", lambda: only_event(event))
+    for callback in (only_event, with_state, with_kwargs):
+        obj = CallableObject(callback)
+        await measure(f"CallableObject({callback.__name__})", lambda: obj.call(event, **CONTEXT))
+
+    sync_filter = FilterObject(lambda event: True)
+    inline_filter = FilterObject(inline(lambda event: True))
+    await measure("sync filter (thread pool)", lambda: sync_filter.call(event, **CONTEXT))
+    await measure("sync filter (inline)", lambda: inline_filter.call(event, **CONTEXT))
+
+    handler = HandlerObject(only_event, filters=[])
+    await measure("HandlerObject.check (no filters)", lambda: handler.check(event, **CONTEXT))
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
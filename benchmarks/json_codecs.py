@@ -0,0 +1,82 @@
+"""
+Сравнение JSON-кодеков на типичном ответе Bots Long Poll и клавиатуре.
+
+Запуск: python -m benchmarks.json_codecs
+"""
+import time
+
+from core.codec import available_codecs
+from core.keyboards.keyboards import VkKeyboard, VkKeyboardColor
+
+ITERATIONS = 20_000
+
+
+def longpoll_response(size=25):
+    update = {
+        'group_id': 123456789,
+        'type': 'message_new',
+        'event_id': 'a1b2c3d4e5f6a1b2c3d4e5f6a1b2c3d4e5f6a1b2',
+        'v': '5.199',
+        'object': {
+            'message': {
+                'date': 1700000000,
+                'from_id': 987654321,
+                'id': 0,
+                'out': 0,
+                'version': 10000001,
+                'attachments': [],
+                'conversation_message_id': 4242,
+                'fwd_messages': [],
+                'important': False,
+                'is_hidden': False,
+                'peer_id': 2000000001,
+                'random_id': 0,
+                'text': 'Привет! Как дела? Нажми кнопку «Меню», чтобы продолжить.',
+                'payload': '{"command":"start"}',
+            },
+            'client_info': {
+                'button_actions': ['text', 'vkpay', 'open_app', 'location', 'open_link', 'callback'],
+                'keyboard': True,
+                'inline_keyboard': True,
+                'carousel': True,
+                'lang_id': 0,
+            },
+        },
+    }
+    return {'ts': '1234', 'updates': [update] * size}
+
+
+def keyboard():
+    kb = VkKeyboard(inline=True)
+    for line in range(3):
+        for i in range(3):
+            kb.add_callback_button(f'Кнопка {line}-{i}', VkKeyboardColor.PRIMARY, payload={'key': f'k{line}{i}'})
+        if line < 2:
+            kb.add_line()
+    return kb.keyboard
+
+
+def measure(func):
+    started = time.perf_counter()
+    for _ in range(ITERATIONS):
+        func()
+    return (time.perf_counter() - started) / ITERATIONS * 1e6
+
+
+def main():
+    response = longpoll_response()
+    keyboard_data = keyboard()
+
+    print(f"{'codec':<8} {'loads lp':>10} {'dumps lp':>10} {'dumps kb':>10}  (us/op)")
+    for codec in available_codecs():
+        raw = codec.dumps(response).encode()
+        print(
+            f"{codec.name:<8}"
+            f" {measure(lambda: codec.loads(raw)):>10.1f}"
+            f" {measure(lambda: codec.dumps(response)):>10.1f}"
+            f" {measure(lambda: codec.dumps(keyboard_data)):>10.1f}"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -1,11 +1,15 @@
 from enum import Enum
-from typing import Optional
+from typing import Optional, Union
 
-from core.keyboards.keyboards import VkKeyboard
+from core.bot.bot_objects import ClientInfo, EventObject, MessageObject
+from core.keyboards.keyboards import FrozenKeyboard, VkKeyboard
 from core.limits import VkLimits
+from core.retry import get_random_id
 from core.vk_api import VkApi
 
 
+# Не используется: данные событий оборачиваются в DictView без копирования.
+# Оставлен только для обратной совместимости с кодом, который его импортирует
 class DotDict(dict):
     __getattr__ = dict.get
     __setattr__ = dict.__setitem__
@@ -82,9 +86,16 @@ class VkBotEventType(Enum):
     VKPAY_TRANSACTION = 'vkpay_transaction'
 
 
+#: Тип события по строковому значению
+EVENT_TYPE_BY_VALUE = {event_type.value: event_type for event_type in VkBotEventType}
+
+
 class VkBotEvent(object):
     """ Событие Bots Long Poll
 
+    Наследники перечисляют в ``OBJECT_FIELDS`` поля объекта события,
+    которые при создании копируются в одноимённые атрибуты (и слоты).
+
     :ivar raw: событие, в каком виде было получено от сервера
 
     :ivar type: тип события
@@ -93,9 +104,16 @@ class VkBotEvent(object):
     :ivar t: сокращение для type
     :vartype t: VkBotEventType or str
 
-    :ivar object: объект события, в каком виде был получен от сервера
+    :ivar object: объект события - обёртка над `raw['object']` без копирования
+    :vartype object: EventObject
     :ivar obj: сокращение для object
 
+    :ivar message: сообщение из объекта события (если есть)
+    :vartype message: MessageObject or None
+
+    :ivar client_info: информация о клиенте (если есть)
+    :vartype client_info: ClientInfo or None
+
     :ivar group_id: ID группы бота
     :vartype group_id: int
     """
@@ -108,32 +126,36 @@ class VkBotEvent(object):
         'group_id', 'vk', 'peer_id',
     )
 
+    #: Поля объекта события, доступные как атрибуты события
+    OBJECT_FIELDS: tuple[str, ...] = ()
+
     def __init__(self, raw):
         self.raw = raw
         self.vk: Optional[VkApi] = None  # Поле для VK API
 
-        try:
-            self.type = VkBotEventType(raw['type']).value
-        except ValueError:
-            self.type = raw['type']
-
+        self.type = raw['type']
         self.t = self.type  # shortcut
 
-        self.object = DotDict(raw['object'])
-        try:
-            self.message = DotDict(raw['object']['message'])
-        except KeyError:
-            self.message = None
-        self.obj = self.object
-        self.peer_id = self.obj.peer_id
+        obj = raw['object']
+        self.object = self.obj = EventObject(obj)
+
+        message = obj.get('message')
+        self.message = MessageObject(message) if message is not None else None
+        self.peer_id = obj.get('peer_id')
 
-        try:
-            self.client_info = DotDict(raw['object']['client_info'])
-        except KeyError:
-            self.client_info = None
+        client_info = obj.get('client_info')
+        self.client_info = ClientInfo(client_info) if client_info is not None else None
 
         self.group_id = raw['group_id']
 
+        for name in self.OBJECT_FIELDS:
+            setattr(self, name, obj.get(name))
+
+    @property
+    def event_type(self) -> Optional[VkBotEventType]:
+        """ Тип события как :class:`VkBotEventType` (None для неизвестных типов) """
+        return EVENT_TYPE_BY_VALUE.get(self.type)
+
     async def event_answer(self):
         """
         Отправляет событие с действием, которое произойдет при нажатии на callback-кнопку.
@@ -145,7 +167,7 @@ class VkBotEvent(object):
         }
         await self.vk.method("messages.sendMessageEventAnswer", params)
 
-    async def answer(self, text: str, keyboard: VkKeyboard = None):
+    async def answer(self, text: str, keyboard: Union[VkKeyboard, FrozenKeyboard] = None):
         """
         Метод отправляет сообщение.
         """
@@ -153,7 +175,7 @@ class VkBotEvent(object):
             "group_id": self.group_id,
             "peer_id": self.peer_id,
             "message": text,
-            "random_id": 0,
+            "random_id": get_random_id(),
         }
         if keyboard:
             params['keyboard'] = keyboard.get_keyboard()
@@ -180,7 +202,7 @@ class VkBotMessageEvent(VkBotEvent):
     :vartype chat_id: int
     """
 
-    __slots__ = ('from_user', 'from_chat', 'from_group', 'chat_id', 'peer_id')
+    __slots__ = ('from_user', 'from_chat', 'from_group', 'chat_id')
 
     def __init__(self, raw):
         super(VkBotMessageEvent, self).__init__(raw)
@@ -202,6 +224,213 @@ class VkBotMessageEvent(VkBotEvent):
 
 
 class VkBotCallbackEvent(VkBotEvent):
-    def __init__(self, raw):
-        super(VkBotCallbackEvent, self).__init__(raw)
-        self.payload = self.object.payload
+    """ Нажатие на callback-кнопку (`message_event`) """
+
+    OBJECT_FIELDS = ('user_id', 'event_id', 'payload', 'conversation_message_id')
+    __slots__ = OBJECT_FIELDS
+
+
+class VkBotTypingStateEvent(VkBotEvent):
+    """ Статус набора текста (`message_typing_state`) """
+
+    OBJECT_FIELDS = ('state', 'from_id', 'to_id')
+    __slots__ = OBJECT_FIELDS
+
+
+class VkBotMessageAccessEvent(VkBotEvent):
+    """ Подписка на сообщения от сообщества и отписка (`message_allow`, `message_deny`) """
+
+    OBJECT_FIELDS = ('user_id', 'key')
+    __slots__ = OBJECT_FIELDS
+
+
+class VkBotMediaEvent(VkBotEvent):
+    """ Добавление фотографии, аудиозаписи или видеозаписи (`photo_new`, `audio_new`, `video_new`) """
+
+    OBJECT_FIELDS = ('id', 'owner_id')
+    __slots__ = OBJECT_FIELDS
+
+
+class VkBotCommentEvent(VkBotEvent):
+    """ Новый, изменённый или восстановленный комментарий
+    к фотографии, видеозаписи, записи на стене, в обсуждении или к товару.
+    Поля комментируемого объекта - в наследниках для каждого вида объекта
+    """
+
+    OBJECT_FIELDS = ('id', 'from_id', 'owner_id', 'date', 'text', 'reply_to_user', 'reply_to_comment')
+    __slots__ = OBJECT_FIELDS
+
+
+class VkBotCommentDeleteEvent(VkBotEvent):
+    """ Удаление комментария к фотографии, видеозаписи, записи на стене, в обсуждении или к товару """
+
+    OBJECT_FIELDS = ('id', 'owner_id', 'user_id', 'deleter_id')
+    __slots__ = OBJECT_FIELDS
+
+
+class VkBotPhotoCommentEvent(VkBotCommentEvent):
+    """ Комментарий к фотографии (`photo_comment_new`, `photo_comment_edit`, `photo_comment_restore`) """
+
+    OBJECT_FIELDS = (*VkBotCommentEvent.OBJECT_FIELDS, 'photo_id', 'photo_owner_id')
+    __slots__ = ('photo_id', 'photo_owner_id')
+
+
+class VkBotPhotoCommentDeleteEvent(VkBotCommentDeleteEvent):
+    """ Удаление комментария к фотографии (`photo_comment_delete`) """
+
+    OBJECT_FIELDS = (*VkBotCommentDeleteEvent.OBJECT_FIELDS, 'photo_id')
+    __slots__ = ('photo_id',)
+
+
+class VkBotVideoCommentEvent(VkBotCommentEvent):
+    """ Комментарий к видеозаписи (`video_comment_new`, `video_comment_edit`, `video_comment_restore`) """
+
+    OBJECT_FIELDS = (*VkBotCommentEvent.OBJECT_FIELDS, 'video_id', 'video_owner_id')
+    __slots__ = ('video_id', 'video_owner_id')
+
+
+class VkBotVideoCommentDeleteEvent(VkBotCommentDeleteEvent):
+    """ Удаление комментария к видеозаписи (`video_comment_delete`) """
+
+    OBJECT_FIELDS = (*VkBotCommentDeleteEvent.OBJECT_FIELDS, 'video_id')
+    __slots__ = ('video_id',)
+
+
+class VkBotWallReplyEvent(VkBotCommentEvent):
+    """ Комментарий к записи на стене (`wall_reply_new`, `wall_reply_edit`, `wall_reply_restore`) """
+
+    OBJECT_FIELDS = (*VkBotCommentEvent.OBJECT_FIELDS, 'post_id', 'post_owner_id')
+    __slots__ = ('post_id', 'post_owner_id')
+
+
+class VkBotWallReplyDeleteEvent(VkBotCommentDeleteEvent):
+    """ Удаление комментария к записи на стене (`wall_reply_delete`) """
+
+    OBJECT_FIELDS = (*VkBotCommentDeleteEvent.OBJECT_FIELDS, 'post_id')
+    __slots__ = ('post_id',)
+
+
+class VkBotBoardPostEvent(VkBotCommentEvent):
+    """ Комментарий в обсуждении (`board_post_new`, `board_post_edit`, `board_post_restore`) """
+
+    OBJECT_FIELDS = (*VkBotCommentEvent.OBJECT_FIELDS, 'topic_id', 'topic_owner_id')
+    __slots__ = ('topic_id', 'topic_owner_id')
+
+
+class VkBotBoardPostDeleteEvent(VkBotCommentDeleteEvent):
+    """ Удаление комментария в обсуждении (`board_post_delete`) """
+
+    OBJECT_FIELDS = (*VkBotCommentDeleteEvent.OBJECT_FIELDS, 'topic_id', 'topic_owner_id')
+    __slots__ = ('topic_id', 'topic_owner_id')
+
+
+class VkBotMarketCommentEvent(VkBotCommentEvent):
+    """ Комментарий к товару (`market_comment_new`, `market_comment_edit`, `market_comment_restore`) """
+
+    OBJECT_FIELDS = (*VkBotCommentEvent.OBJECT_FIELDS, 'item_id', 'market_owner_id')
+    __slots__ = ('item_id', 'market_owner_id')
+
+
+class VkBotMarketCommentDeleteEvent(VkBotCommentDeleteEvent):
+    """ Удаление комментария к товару (`market_comment_delete`) """
+
+    OBJECT_FIELDS = (*VkBotCommentDeleteEvent.OBJECT_FIELDS, 'item_id')
+    __slots__ = ('item_id',)
+
+
+class VkBotWallPostEvent(VkBotEvent):
+    """ Запись на стене или репост (`wall_post_new`, `wall_repost`) """
+
+    OBJECT_FIELDS = ('id', 'owner_id', 'from_id', 'created_by', 'date', 'text', 'post_type')
+    __slots__ = OBJECT_FIELDS
+
+
+class VkBotGroupMemberEvent(VkBotEvent):
+    """ Вступление в сообщество или выход из него (`group_join`, `group_leave`) """
+
+    OBJECT_FIELDS = ('user_id', 'join_type')
+    __slots__ = OBJECT_FIELDS
+
+
+class VkBotUserBlockEvent(VkBotEvent):
+    """ Блокировка и разблокировка пользователя (`user_block`, `user_unblock`) """
+
+    OBJECT_FIELDS = ('admin_id', 'user_id', 'unblock_date', 'reason', 'comment', 'by_end_date')
+    __slots__ = OBJECT_FIELDS
+
+
+class VkBotPollVoteEvent(VkBotEvent):
+    """ Голос в опросе (`poll_vote_new`) """
+
+    OBJECT_FIELDS = ('owner_id', 'poll_id', 'option_id', 'user_id')
+    __slots__ = OBJECT_FIELDS
+
+
+class VkBotGroupChangeEvent(VkBotEvent):
+    """ Изменение руководства, настроек или главной фотографии сообщества """
+
+    OBJECT_FIELDS = ('user_id', 'admin_id', 'level_old', 'level_new', 'changes', 'photo')
+    __slots__ = OBJECT_FIELDS
+
+
+class VkBotVkPayTransactionEvent(VkBotEvent):
+    """ Платёж через VK Pay (`vkpay_transaction`) """
+
+    OBJECT_FIELDS = ('from_id', 'amount', 'description', 'date')
+    __slots__ = OBJECT_FIELDS
+
+
+#: Класс события по строковому типу
+EVENT_CLASS_BY_TYPE: dict[str, type[VkBotEvent]] = {
+    VkBotEventType.MESSAGE_NEW.value: VkBotMessageEvent,
+    VkBotEventType.MESSAGE_REPLY.value: VkBotMessageEvent,
+    VkBotEventType.MESSAGE_EDIT.value: VkBotMessageEvent,
+    VkBotEventType.MESSAGE_EVENT.value: VkBotCallbackEvent,
+    VkBotEventType.MESSAGE_TYPING_STATE.value: VkBotTypingStateEvent,
+    VkBotEventType.MESSAGE_ALLOW.value: VkBotMessageAccessEvent,
+    VkBotEventType.MESSAGE_DENY.value: VkBotMessageAccessEvent,
+
+    VkBotEventType.PHOTO_NEW.value: VkBotMediaEvent,
+    VkBotEventType.AUDIO_NEW.value: VkBotMediaEvent,
+    VkBotEventType.VIDEO_NEW.value: VkBotMediaEvent,
+
+    VkBotEventType.PHOTO_COMMENT_NEW.value: VkBotPhotoCommentEvent,
+    VkBotEventType.PHOTO_COMMENT_EDIT.value: VkBotPhotoCommentEvent,
+    VkBotEventType.PHOTO_COMMENT_RESTORE.value: VkBotPhotoCommentEvent,
+    VkBotEventType.PHOTO_COMMENT_DELETE.value: VkBotPhotoCommentDeleteEvent,
+
+    VkBotEventType.VIDEO_COMMENT_NEW.value: VkBotVideoCommentEvent,
+    VkBotEventType.VIDEO_COMMENT_EDIT.value: VkBotVideoCommentEvent,
+    VkBotEventType.VIDEO_COMMENT_RESTORE.value: VkBotVideoCommentEvent,
+    VkBotEventType.VIDEO_COMMENT_DELETE.value: VkBotVideoCommentDeleteEvent,
+
+    VkBotEventType.WALL_REPLY_NEW.value: VkBotWallReplyEvent,
+    VkBotEventType.WALL_REPLY_EDIT.value: VkBotWallReplyEvent,
+    VkBotEventType.WALL_REPLY_RESTORE.value: VkBotWallReplyEvent,
+    VkBotEventType.WALL_REPLY_DELETE.value: VkBotWallReplyDeleteEvent,
+
+    VkBotEventType.BOARD_POST_NEW.value: VkBotBoardPostEvent,
+    VkBotEventType.BOARD_POST_EDIT.value: VkBotBoardPostEvent,
+    VkBotEventType.BOARD_POST_RESTORE.value: VkBotBoardPostEvent,
+    VkBotEventType.BOARD_POST_DELETE.value: VkBotBoardPostDeleteEvent,
+
+    VkBotEventType.MARKET_COMMENT_NEW.value: VkBotMarketCommentEvent,
+    VkBotEventType.MARKET_COMMENT_EDIT.value: VkBotMarketCommentEvent,
+    VkBotEventType.MARKET_COMMENT_RESTORE.value: VkBotMarketCommentEvent,
+    VkBotEventType.MARKET_COMMENT_DELETE.value: VkBotMarketCommentDeleteEvent,
+
+    VkBotEventType.WALL_POST_NEW.value: VkBotWallPostEvent,
+    VkBotEventType.WALL_REPOST.value: VkBotWallPostEvent,
+
+    VkBotEventType.GROUP_JOIN.value: VkBotGroupMemberEvent,
+    VkBotEventType.GROUP_LEAVE.value: VkBotGroupMemberEvent,
+    VkBotEventType.USER_BLOCK.value: VkBotUserBlockEvent,
+    VkBotEventType.USER_UNBLOCK.value: VkBotUserBlockEvent,
+    VkBotEventType.POLL_VOTE_NEW.value: VkBotPollVoteEvent,
+
+    VkBotEventType.GROUP_OFFICERS_EDIT.value: VkBotGroupChangeEvent,
+    VkBotEventType.GROUP_CHANGE_SETTINGS.value: VkBotGroupChangeEvent,
+    VkBotEventType.GROUP_CHANGE_PHOTO.value: VkBotGroupChangeEvent,
+
+    VkBotEventType.VKPAY_TRANSACTION.value: VkBotVkPayTransactionEvent,
+}
@@ -1,10 +1,9 @@
 import logging
 
-import aiohttp
-
 from aiohttp.web_exceptions import HTTPError
 
-from core.bot.bot_events import VkBotCallbackEvent, VkBotEvent, VkBotEventType, VkBotMessageEvent
+from core.bot.bot_events import EVENT_CLASS_BY_TYPE, VkBotEvent
+from core.longpoll import ReconnectPolicy, listen_events
 
 CHAT_START_ID = int(2E9)
 
@@ -17,36 +16,44 @@ class VkBotLongPoll(object):
     :param vk: объект :class:`VkApi`
     :param group_id: id группы
     :param wait: время ожидания
+    :param reconnect: правила переподключения (:class:`ReconnectPolicy`)
     """
 
     __slots__ = (
         'vk', 'wait', 'group_id',
-        'url', 'session',
-        'key', 'server', 'ts'
+        'url',
+        'key', 'server', 'ts', 'reconnect'
     )
 
     #: Классы для событий по типам
-    CLASS_BY_EVENT_TYPE = {
-        VkBotEventType.MESSAGE_NEW.value: VkBotMessageEvent,
-        VkBotEventType.MESSAGE_REPLY.value: VkBotMessageEvent,
-        VkBotEventType.MESSAGE_EDIT.value: VkBotMessageEvent,
-        VkBotEventType.MESSAGE_EVENT.value: VkBotCallbackEvent,
-    }
+    CLASS_BY_EVENT_TYPE = dict(EVENT_CLASS_BY_TYPE)
 
     #: Класс для событий
     DEFAULT_EVENT_CLASS = VkBotEvent
 
-    def __init__(self, vk, group_id, wait=25):
+    def __init__(self, vk, group_id, wait=25, reconnect=None):
         self.vk = vk
         self.group_id = group_id
         self.wait = wait
+        self.reconnect = reconnect or ReconnectPolicy()
 
         self.url = None
         self.key = None
         self.server = None
         self.ts = None
 
-        self.session = aiohttp.ClientSession()
+    @property
+    def checkpoint_key(self):
+        """ Идентификатор для хранения позиции в :class:`CheckpointStore` """
+        return f'bot:{self.group_id}'
+
+    def get_state(self):
+        """ Текущая позиция на сервере """
+        return {'ts': self.ts}
+
+    def set_state(self, state):
+        """ Продолжить с сохранённой позиции """
+        self.ts = state['ts']
 
     def _parse_event(self, raw_event):
         event_class = self.CLASS_BY_EVENT_TYPE.get(
@@ -77,6 +84,7 @@ class VkBotLongPoll(object):
         if update_ts:
             self.ts = response['ts']
 
+        self.reconnect.key_updated()
         logging.debug(f"Longpoll server updated. Server '{self.url}' key: {self.key}")
 
     async def get_events(self):
@@ -115,3 +123,13 @@ class VkBotLongPoll(object):
             await self.update_longpoll_server()
 
         return []
+
+    def listen(self, queue_size=1000, checkpoints=False):
+        """ Слушать сервер: запросы отправляются непрерывно, события выдаются по мере получения
+
+        `async for event in longpoll.listen(): ...`
+
+        :param queue_size: размер буфера полученных событий
+        :param checkpoints: после событий каждого ответа выдавать :class:`LongPollCheckpoint`
+        """
+        return listen_events(self, queue_size, checkpoints)
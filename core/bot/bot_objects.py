@@ -0,0 +1,102 @@
+from collections.abc import Iterator, Mapping
+from typing import Any
+
+
+class DictView(Mapping):
+    """ Доступ к полям словаря через атрибуты без копирования словаря.
+
+    Отсутствующее поле возвращает None. Вложенные значения возвращаются как есть.
+    Присваивание атрибута записывает значение в исходный словарь.
+
+    Наследники могут перечислить известные поля в ``FIELDS``: для них создаются
+    свойства, которые читаются быстрее, чем через ``__getattr__``.
+
+    :param data: исходный словарь
+    """
+
+    __slots__ = ('_data',)
+
+    #: Известные поля объекта
+    FIELDS: tuple[str, ...] = ()
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        for name in cls.__dict__.get('FIELDS', ()):
+            setattr(cls, name, _field(name))
+
+    def __init__(self, data: dict):
+        object.__setattr__(self, '_data', data)
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return self._data.get(name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        self._data[name] = value
+
+    def __delattr__(self, name: str) -> None:
+        del self._data[name]
+
+    def __getitem__(self, key: str) -> Any:
+        return self._data[key]
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self._data[key] = value
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._data
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self._data.get(key, default)
+
+    def to_dict(self) -> dict:
+        """ Исходный словарь """
+        return self._data
+
+    def __repr__(self):
+        return f'{type(self).__name__}({self._data!r})'
+
+
+def _field(name: str) -> property:
+    def getter(self: DictView) -> Any:
+        return self._data.get(name)
+
+    return property(getter, doc=f"Поле `{name}`")
+
+
+class MessageObject(DictView):
+    """ Объект личного сообщения (`документация <https://dev.vk.com/ru/reference/objects/message>`__) """
+
+    __slots__ = ()
+
+    FIELDS = (
+        'id', 'date', 'peer_id', 'from_id', 'out', 'text', 'random_id', 'conversation_message_id',
+        'attachments', 'payload', 'keyboard', 'fwd_messages', 'reply_message', 'action',
+        'important', 'is_hidden', 'geo', 'ref', 'ref_source', 'admin_author_id', 'update_time',
+    )
+
+
+class ClientInfo(DictView):
+    """ Информация о возможностях клиента пользователя """
+
+    __slots__ = ()
+
+    FIELDS = ('button_actions', 'keyboard', 'inline_keyboard', 'carousel', 'lang_id')
+
+
+class EventObject(DictView):
+    """ Объект события Bots Long Poll. Содержит поля всех типов событий, используемых библиотекой """
+
+    __slots__ = ()
+
+    FIELDS = (
+        'message', 'client_info',
+        'user_id', 'peer_id', 'event_id', 'payload', 'conversation_message_id',
+    )
@@ -0,0 +1,182 @@
+import hmac
+import logging
+
+from collections import OrderedDict
+from typing import Any, Optional
+
+from aiohttp import web
+
+from core.bot.bot_events import EVENT_CLASS_BY_TYPE, VkBotEvent
+from core.codec import get_codec
+from core.handlers.router import Router
+from core.runner import LongPollRunner
+from core.vk_api import VkApi
+
+
+class VkCallbackServer(object):
+    """ Приём событий через Callback API
+
+    `Подробнее в документации VK API <https://dev.vk.com/ru/api/callback/getting-started>`__.
+
+    Альтернатива :class:`VkBotLongPoll`: VK сам присылает события HTTP-запросами.
+    Сервер сразу отвечает "ok", а событие передаётся в :class:`LongPollRunner`
+    и обрабатывается асинхронно, с теми же ограничениями и порядком по ``peer_id``.
+
+    Повторно присланные VK события (с уже принятым ``event_id``) пропускаются.
+    Ответ никогда не ждёт очереди обработки: если в :class:`LongPollRunner` уже принято
+    ``max_pending`` событий, сервер отвечает 503, и VK присылает событие повторно позже.
+
+    :param router: корневой маршрутизатор
+    :param vk: объект :class:`VkApi`, который будет передан событиям
+    :param confirmation_code: строка для подтверждения адреса сервера
+    :param secret: секретный ключ из настроек Callback API
+    :param group_id: id группы. События других групп отклоняются
+    :param path: путь, на который VK присылает события
+    :param runner: объект :class:`LongPollRunner` для обработки событий
+        (по умолчанию создаётся новый)
+    :param dedup_size: сколько последних ``event_id`` запоминать для пропуска повторов
+    """
+
+    __slots__ = (
+        'router', 'vk', 'confirmation_code', 'secret', 'group_id', 'path',
+        'runner', 'dedup_size', '_seen', '_app_runner',
+        'received', 'rejected', 'duplicates', 'overloaded',
+    )
+
+    #: Классы для событий по типам
+    CLASS_BY_EVENT_TYPE = dict(EVENT_CLASS_BY_TYPE)
+
+    #: Класс для событий
+    DEFAULT_EVENT_CLASS = VkBotEvent
+
+    def __init__(
+            self,
+            router: Router,
+            vk: VkApi,
+            confirmation_code: str,
+            secret: Optional[str] = None,
+            group_id: Optional[int] = None,
+            path: str = '/',
+            runner: Optional[LongPollRunner] = None,
+            dedup_size: int = 10000,
+    ):
+        self.router = router
+        self.vk = vk
+        self.confirmation_code = confirmation_code
+        self.secret = secret
+        self.group_id = group_id
+        self.path = path
+        self.runner = runner or LongPollRunner(router, vk)
+        if self.runner.vk is None:
+            self.runner.vk = vk
+        self.dedup_size = dedup_size
+
+        self._seen: OrderedDict[str, None] = OrderedDict()
+        self._app_runner: Optional[web.AppRunner] = None
+
+        # Счётчики
+        self.received = 0
+        self.rejected = 0
+        self.duplicates = 0
+        self.overloaded = 0
+
+    def _parse_event(self, raw_event):
+        event_class = self.CLASS_BY_EVENT_TYPE.get(
+            raw_event['type'],
+            self.DEFAULT_EVENT_CLASS
+        )
+        return event_class(raw_event)
+
+    def _is_duplicate(self, event_id: Optional[str]) -> bool:
+        return bool(event_id) and event_id in self._seen
+
+    def _remember(self, event_id: Optional[str]) -> None:
+        if not event_id or not self.dedup_size:
+            return
+        self._seen[event_id] = None
+        if len(self._seen) > self.dedup_size:
+            self._seen.popitem(last=False)
+
+    def _check_secret(self, data: dict) -> bool:
+        if self.secret is None:
+            return True
+        secret = data.get('secret')
+        return isinstance(secret, str) and hmac.compare_digest(secret, self.secret)
+
+    async def handle(self, request: web.Request) -> web.Response:
+        """ Обработчик запроса от VK """
+        try:
+            data = get_codec().loads(await request.read())
+        except ValueError:
+            self.rejected += 1
+            return web.Response(status=400, text='bad request')
+
+        if not isinstance(data, dict) or 'type' not in data:
+            self.rejected += 1
+            return web.Response(status=400, text='bad request')
+
+        if self.group_id is not None and data.get('group_id') != self.group_id:
+            self.rejected += 1
+            logging.warning("Callback event for unexpected group %s", data.get('group_id'))
+            return web.Response(status=403, text='forbidden')
+
+        if not self._check_secret(data):
+            self.rejected += 1
+            logging.warning("Callback event with invalid secret from %s", request.remote)
+            return web.Response(status=403, text='forbidden')
+
+        if data['type'] == 'confirmation':
+            return web.Response(text=self.confirmation_code)
+
+        if self._is_duplicate(data.get('event_id')):
+            self.duplicates += 1
+            return web.Response(text='ok')
+
+        try:
+            event = self._parse_event(data)
+        except Exception as e:
+            # Повтор запроса не поможет, поэтому VK всё равно отвечаем "ok"
+            self.rejected += 1
+            logging.exception("Failed to parse callback event: %s", e)
+            return web.Response(text='ok')
+
+        if not await self.runner.try_submit(event):
+            # event_id не запоминается, чтобы повтор от VK был принят
+            self.overloaded += 1
+            logging.warning("Dispatch queue is full, callback event %s deferred", data.get('event_id'))
+            return web.Response(status=503, text='busy')
+
+        self.received += 1
+        self._remember(data.get('event_id'))
+        return web.Response(text='ok')
+
+    def make_app(self) -> web.Application:
+        """ Приложение aiohttp с обработчиком событий. Можно подключить к своему приложению """
+        app = web.Application()
+        app.router.add_post(self.path, self.handle)
+        return app
+
+    async def start(self, host: str = '0.0.0.0', port: int = 8080) -> None:
+        """ Запустить HTTP-сервер """
+        self._app_runner = web.AppRunner(self.make_app())
+        await self._app_runner.setup()
+        site = web.TCPSite(self._app_runner, host, port)
+        await site.start()
+        logging.info("Callback server listening on %s:%s%s", host, port, self.path)
+
+    async def stop(self) -> None:
+        """ Остановить HTTP-сервер и дождаться обработки принятых событий """
+        if self._app_runner is not None:
+            await self._app_runner.cleanup()
+            self._app_runner = None
+        await self.runner.join()
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        return {
+            'received': self.received,
+            'rejected': self.rejected,
+            'duplicates': self.duplicates,
+            'overloaded': self.overloaded,
+            'dispatch': self.runner.stats,
+        }
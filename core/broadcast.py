@@ -0,0 +1,241 @@
+import asyncio
+import inspect
+import logging
+import zlib
+
+from typing import Any, Awaitable, Callable, Optional, Sequence, Union
+
+from core.checkpoint import CheckpointStore
+from core.execute import MAX_EXECUTE_CALLS, compile_execute_code, split_execute_response
+from core.retry import get_random_id
+from core.vk_api import VkApi
+
+#: Максимальное количество получателей в одном вызове `messages.send`
+MAX_PEER_IDS = 100
+
+
+class BroadcastProgress:
+    """
+    Ход рассылки.
+
+    :ivar total: количество получателей
+    :ivar sent: сколько сообщений отправлено
+    :ivar failed: сколько сообщений не отправлено
+    :ivar errors: ошибки по получателям (только для текущего запуска)
+    """
+
+    __slots__ = ('total', 'sent', 'failed', 'errors')
+
+    def __init__(self, total: int, sent: int = 0, failed: int = 0):
+        self.total = total
+        self.sent = sent
+        self.failed = failed
+        self.errors: dict[int, dict] = {}
+
+    @property
+    def done(self) -> int:
+        return self.sent + self.failed
+
+    @property
+    def finished(self) -> bool:
+        return self.done >= self.total
+
+    def __repr__(self):
+        return f'<BroadcastProgress({self.done}/{self.total}, sent={self.sent}, failed={self.failed})>'
+
+
+class Broadcast:
+    """
+    Рассылка одного сообщения множеству получателей.
+
+    Получатели делятся на группы по ``peer_ids`` (до 100 в одном `messages.send`),
+    группы объединяются в запросы execute (до 25 вызовов в одном). Запросы идут
+    через ограничитель и правила повтора :class:`VkApi`, не более ``concurrency`` одновременно.
+
+    Для каждой группы ``random_id`` вычисляется из случайного номера запуска и номера группы,
+    поэтому повторная отправка группы не создаст дубликатов, а новая рассылка
+    с тем же ``key`` не будет отброшена VK как повтор предыдущей.
+    Если передано хранилище, позиция и номер запуска сохраняются после каждого запроса,
+    и при следующем запуске с тем же ``key`` рассылка продолжается с неё. Список получателей
+    при этом должен быть тем же. Завершённая рассылка из хранилища не удаляется:
+    чтобы отправить её ещё раз, используйте новый ``key``.
+
+    :param vk: объект :class:`VkApi`
+    :param peer_ids: получатели
+    :param params: параметры `messages.send` (``message``, ``attachment``, ``keyboard``, ...)
+    :param key: идентификатор рассылки в хранилище
+    :param checkpoint_store: хранилище позиции рассылки
+    :param on_progress: функция или корутина, вызываемая с :class:`BroadcastProgress`
+        после каждого запроса
+    :param chunk_size: получателей в одном `messages.send`
+    :param calls_per_execute: вызовов `messages.send` в одном execute
+    :param concurrency: максимальное количество одновременных запросов execute
+    """
+
+    def __init__(
+            self,
+            vk: VkApi,
+            peer_ids: Sequence[int],
+            params: dict[str, Any],
+            key: Optional[str] = None,
+            checkpoint_store: Optional[CheckpointStore] = None,
+            on_progress: Optional[Callable[[BroadcastProgress], Union[Awaitable[None], None]]] = None,
+            chunk_size: int = MAX_PEER_IDS,
+            calls_per_execute: int = MAX_EXECUTE_CALLS,
+            concurrency: int = 4,
+    ):
+        if not 1 <= chunk_size <= MAX_PEER_IDS:
+            raise ValueError(f"chunk_size must be between 1 and {MAX_PEER_IDS}")
+        if not 1 <= calls_per_execute <= MAX_EXECUTE_CALLS:
+            raise ValueError(f"calls_per_execute must be between 1 and {MAX_EXECUTE_CALLS}")
+        if checkpoint_store is not None and key is None:
+            raise ValueError("key is required to resume a broadcast from checkpoint_store")
+
+        self.vk = vk
+        self.peer_ids = list(peer_ids)
+        self.params = {k: v for k, v in params.items() if k not in ('peer_id', 'peer_ids', 'user_id', 'random_id')}
+        self.key = key
+        self.checkpoint_store = checkpoint_store
+        self.on_progress = on_progress
+        self.chunk_size = chunk_size
+        self.calls_per_execute = calls_per_execute
+        self.concurrency = concurrency
+
+        self.progress = BroadcastProgress(len(self.peer_ids))
+        # Номер запуска: входит в random_id, восстанавливается из хранилища при продолжении
+        self._nonce = get_random_id()
+
+        # Завершённые запросы, ещё не вошедшие в сохранённую позицию: номер -> (отправлено, ошибок)
+        self._next_batch = 0
+        self._completed: dict[int, tuple[int, int]] = {}
+        self._saved_sent = 0
+        self._saved_failed = 0
+
+    @property
+    def checkpoint_key(self) -> str:
+        return f'broadcast:{self.key}'
+
+    def _random_id(self, chunk_index: int) -> int:
+        return zlib.crc32(f'{self._nonce}:{chunk_index}'.encode()) & 0x7FFFFFFF
+
+    def _chunks(self) -> list[tuple[int, list[int]]]:
+        size = self.chunk_size
+        return [
+            (index, self.peer_ids[start:start + size])
+            for index, start in enumerate(range(0, len(self.peer_ids), size))
+        ]
+
+    def _batches(self) -> list[list[tuple[int, list[int]]]]:
+        chunks = self._chunks()
+        size = self.calls_per_execute
+        return [chunks[start:start + size] for start in range(0, len(chunks), size)]
+
+    async def _send_batch(self, batch: list[tuple[int, list[int]]]) -> list[dict]:
+        calls = [
+            (
+                'messages.send',
+                {**self.params, 'peer_ids': ','.join(map(str, peer_ids)), 'random_id': self._random_id(index)},
+            )
+            for index, peer_ids in batch
+        ]
+        if len(calls) == 1:
+            method, params = calls[0]
+            return [await self.vk.request(method, params)]
+
+        code = compile_execute_code(calls, self.vk.codec.dumps)
+        response = await self.vk.request('execute', {'code': code})
+        return split_execute_response(response, len(calls))
+
+    def _account(self, batch: list[tuple[int, list[int]]], results: list[dict]) -> tuple[int, int]:
+        progress = self.progress
+        sent, failed = progress.sent, progress.failed
+        for (_, peer_ids), result in zip(batch, results):
+            if 'error' in result:
+                progress.failed += len(peer_ids)
+                for peer_id in peer_ids:
+                    progress.errors[peer_id] = result['error']
+                continue
+
+            delivered = set()
+            for item in result.get('response') or ():
+                peer_id = item.get('peer_id')
+                delivered.add(peer_id)
+                if 'error' in item:
+                    progress.failed += 1
+                    progress.errors[peer_id] = item['error']
+                else:
+                    progress.sent += 1
+
+            for peer_id in peer_ids:
+                if peer_id not in delivered:
+                    progress.failed += 1
+                    progress.errors[peer_id] = {'error_code': 0, 'error_msg': 'No result for peer'}
+
+        return progress.sent - sent, progress.failed - failed
+
+    async def _report(self) -> None:
+        if self.on_progress is None:
+            return
+        try:
+            result = self.on_progress(self.progress)
+            if inspect.isawaitable(result):
+                await result
+        except Exception as e:
+            logging.exception("Broadcast progress callback failed: %s", e)
+
+    async def _save(self) -> None:
+        if self.checkpoint_store is None:
+            return
+        state = {
+            'nonce': self._nonce,
+            'next_batch': self._next_batch,
+            'sent': self._saved_sent,
+            'failed': self._saved_failed,
+        }
+        try:
+            await self.checkpoint_store.save(self.checkpoint_key, state)
+        except Exception as e:
+            logging.exception("Failed to save broadcast checkpoint: %s", e)
+
+    async def _load(self) -> None:
+        if self.checkpoint_store is None:
+            return
+        state = await self.checkpoint_store.load(self.checkpoint_key)
+        if state is None:
+            return
+        self._nonce = state['nonce']
+        self._next_batch = state['next_batch']
+        self.progress.sent = self._saved_sent = state['sent']
+        self.progress.failed = self._saved_failed = state['failed']
+        logging.info("Resuming broadcast %s from batch %s", self.key, self._next_batch)
+
+    async def run(self) -> BroadcastProgress:
+        """ Выполнить рассылку (или продолжить прерванную) """
+        await self._load()
+        batches = self._batches()
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def send(number: int, batch: list[tuple[int, list[int]]]) -> None:
+            async with semaphore:
+                try:
+                    results = await self._send_batch(batch)
+                except Exception as e:
+                    logging.exception("Broadcast batch %s failed: %s", number, e)
+                    error = {'error_code': 0, 'error_msg': repr(e)}
+                    results = [{'error': error}] * len(batch)
+
+            self._completed[number] = self._account(batch, results)
+            while self._next_batch in self._completed:
+                sent, failed = self._completed.pop(self._next_batch)
+                self._saved_sent += sent
+                self._saved_failed += failed
+                self._next_batch += 1
+            await self._save()
+            await self._report()
+
+        await asyncio.gather(*(
+            send(number, batch)
+            for number, batch in enumerate(batches)
+            if number >= self._next_batch
+        ))
+        return self.progress
@@ -0,0 +1,129 @@
+import asyncio
+import functools
+import time
+
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+from core.execute import _normalize_value
+
+#: Время жизни ответов методов по умолчанию в секундах
+DEFAULT_TTL_BY_METHOD = {
+    'users.get': 300.0,
+    'groups.getById': 600.0,
+    'messages.getConversationsById': 60.0,
+}
+
+#: Параметры, которые не влияют на ответ и не входят в ключ кэша
+IGNORED_PARAMS = frozenset({'access_token', 'v'})
+
+
+def make_key(method: str, params: dict) -> Hashable:
+    """ Ключ кэша: метод и параметры без учёта порядка и способа записи значений """
+    return method, tuple(sorted(
+        (name, str(_normalize_value(value)))
+        for name, value in params.items()
+        if value is not None and name not in IGNORED_PARAMS
+    ))
+
+
+class ResponseCache:
+    """
+    Кэш ответов методов API, которые только читают данные.
+
+    Кэшируются только успешные ответы методов из ``ttl_by_method``, каждый со своим временем жизни.
+    При превышении ``maxsize`` удаляются давно не использованные ответы.
+    Одинаковые одновременные вызовы объединяются: выполняется один запрос,
+    и все вызывающие получают его результат.
+
+    Ответ отдаётся всем вызывающим одним и тем же объектом, изменять его нельзя.
+
+    :param ttl_by_method: время жизни ответов по методам в секундах
+    :param maxsize: максимальное количество ответов в кэше
+    """
+
+    __slots__ = ('ttl_by_method', 'maxsize', '_entries', '_inflight', 'hits', 'misses', 'coalesced')
+
+    def __init__(self, ttl_by_method: Optional[dict[str, float]] = None, maxsize: int = 10000):
+        self.ttl_by_method = dict(DEFAULT_TTL_BY_METHOD if ttl_by_method is None else ttl_by_method)
+        self.maxsize = maxsize
+
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+
+        # Счётчики
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def cacheable(self, method: str) -> bool:
+        return method in self.ttl_by_method
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """ Ответ из кэша или None, если его нет или он устарел """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires, response = entry
+        if expires <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return response
+
+    def put(self, key: Hashable, ttl: float, response: Any) -> None:
+        self._entries[key] = (time.monotonic() + ttl, response)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    async def fetch(self, method: str, params: dict, call: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Вернуть ответ из кэша, дождаться такого же выполняющегося вызова или выполнить ``call``.
+
+        :param method: название метода
+        :param params: параметры
+        :param call: выполнение запроса
+        """
+        key = make_key(method, params)
+        response = self.get(key)
+        if response is not None:
+            self.hits += 1
+            return response
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            # Запрос выполняется в отдельной задаче: отмена одного из ожидающих,
+            # в том числе первого, не отменяет запрос для остальных
+            task = self._inflight[key] = asyncio.create_task(call())
+            task.add_done_callback(functools.partial(self._complete, key, self.ttl_by_method[method]))
+        return await asyncio.shield(task)
+
+    def _complete(self, key: Hashable, ttl: float, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if task.cancelled() or task.exception() is not None:
+            return
+        response = task.result()
+        if isinstance(response, dict) and 'error' not in response:
+            self.put(key, ttl, response)
+
+    def invalidate(self, method: Optional[str] = None) -> None:
+        """ Удалить ответы метода или все ответы """
+        if method is None:
+            self._entries.clear()
+            return
+        for key in [key for key in self._entries if key[0] == method]:
+            del self._entries[key]
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'size': len(self._entries),
+        }
@@ -0,0 +1,141 @@
+import asyncio
+import os
+import sqlite3
+
+from abc import ABC, abstractmethod
+from typing import Any, Optional
+
+from core.codec import get_codec
+
+
+class CheckpointStore(ABC):
+    """
+    Хранилище позиции long poll (`ts`, `pts`) между перезапусками.
+
+    :class:`LongPollRunner` сохраняет позицию только после того, как все события
+    до неё обработаны, и продолжает с неё при следующем запуске.
+    """
+
+    @abstractmethod
+    async def load(self, key: str) -> Optional[dict[str, Any]]:
+        """
+        Загрузить сохранённую позицию.
+
+        :param key: идентификатор long poll (см. :attr:`VkBotLongPoll.checkpoint_key`)
+        :return: состояние или None, если ничего не сохранено
+        """
+
+    @abstractmethod
+    async def save(self, key: str, state: dict[str, Any]) -> None:
+        """
+        Сохранить позицию.
+
+        :param key: идентификатор long poll
+        :param state: состояние (см. :meth:`VkBotLongPoll.get_state`)
+        """
+
+
+class MemoryCheckpointStore(CheckpointStore):
+    """ Хранилище в памяти процесса. Подходит для тестов и перезапуска long poll внутри процесса """
+
+    def __init__(self) -> None:
+        self.states: dict[str, dict[str, Any]] = {}
+
+    async def load(self, key: str) -> Optional[dict[str, Any]]:
+        state = self.states.get(key)
+        return dict(state) if state is not None else None
+
+    async def save(self, key: str, state: dict[str, Any]) -> None:
+        self.states[key] = dict(state)
+
+
+class FileCheckpointStore(CheckpointStore):
+    """
+    Хранилище в JSON-файле. Файл перезаписывается атомарно.
+
+    :param path: путь к файлу
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = asyncio.Lock()
+
+    def _read(self) -> dict[str, Any]:
+        try:
+            with open(self.path, 'rb') as file:
+                return get_codec().loads(file.read())
+        except FileNotFoundError:
+            return {}
+
+    def _write(self, key: str, state: dict[str, Any]) -> None:
+        states = self._read()
+        states[key] = state
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            file.write(get_codec().dumps(states))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, self.path)
+
+    async def load(self, key: str) -> Optional[dict[str, Any]]:
+        async with self._lock:
+            states = await asyncio.to_thread(self._read)
+        return states.get(key)
+
+    async def save(self, key: str, state: dict[str, Any]) -> None:
+        async with self._lock:
+            await asyncio.to_thread(self._write, key, state)
+
+
+class SQLiteCheckpointStore(CheckpointStore):
+    """
+    Хранилище в базе SQLite.
+
+    :param path: путь к файлу базы
+    :param table: имя таблицы
+    """
+
+    def __init__(self, path: str, table: str = 'longpoll_checkpoints') -> None:
+        if not table.isidentifier():
+            raise ValueError(f"Invalid table name {table!r}")
+        self.path = path
+        self.table = table
+        self._lock = asyncio.Lock()
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path)
+        if not self._initialized:
+            connection.execute(
+                f'CREATE TABLE IF NOT EXISTS {self.table} (key TEXT PRIMARY KEY, state TEXT NOT NULL)'
+            )
+            connection.commit()
+            self._initialized = True
+        return connection
+
+    def _read(self, key: str) -> Optional[dict[str, Any]]:
+        connection = self._connect()
+        try:
+            row = connection.execute(f'SELECT state FROM {self.table} WHERE key = ?', (key,)).fetchone()
+        finally:
+            connection.close()
+        return get_codec().loads(row[0]) if row else None
+
+    def _write(self, key: str, state: dict[str, Any]) -> None:
+        connection = self._connect()
+        try:
+            with connection:
+                connection.execute(
+                    f'INSERT OR REPLACE INTO {self.table} (key, state) VALUES (?, ?)',
+                    (key, get_codec().dumps(state)),
+                )
+        finally:
+            connection.close()
+
+    async def load(self, key: str) -> Optional[dict[str, Any]]:
+        async with self._lock:
+            return await asyncio.to_thread(self._read, key)
+
+    async def save(self, key: str, state: dict[str, Any]) -> None:
+        async with self._lock:
+            await asyncio.to_thread(self._write, key, state)
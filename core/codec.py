@@ -0,0 +1,108 @@
+import json
+
+from typing import Any, Callable, Optional, Union
+
+
+class JsonCodec:
+    """
+    Функции кодирования и декодирования JSON.
+
+    ``dumps`` всегда возвращает компактную строку без экранирования не-ASCII символов,
+    в таком виде VK принимает клавиатуры и payload.
+    ``loads`` при некорректных данных выбрасывает :class:`json.JSONDecodeError` (или наследника).
+
+    :param name: название библиотеки
+    :param dumps: сериализация объекта в строку
+    :param loads: разбор строки или bytes
+    """
+
+    __slots__ = ('name', 'dumps', 'loads')
+
+    def __init__(self, name: str, dumps: Callable[[Any], str], loads: Callable[[Union[str, bytes]], Any]):
+        self.name = name
+        self.dumps = dumps
+        self.loads = loads
+
+    def __repr__(self):
+        return f'<JsonCodec({self.name})>'
+
+
+def _stdlib_codec() -> JsonCodec:
+    def dumps(obj: Any) -> str:
+        return json.dumps(obj, ensure_ascii=False, separators=(',', ':'))
+
+    return JsonCodec('json', dumps, json.loads)
+
+
+def _orjson_codec() -> Optional[JsonCodec]:
+    try:
+        import orjson
+    except ImportError:
+        return None
+
+    def dumps(obj: Any) -> str:
+        # Как и json, допускаем словари с ключами-числами (например, по id пользователей)
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+
+    return JsonCodec('orjson', dumps, orjson.loads)
+
+
+def _ujson_codec() -> Optional[JsonCodec]:
+    try:
+        import ujson
+    except ImportError:
+        return None
+
+    def dumps(obj: Any) -> str:
+        return ujson.dumps(obj, ensure_ascii=False, escape_forward_slashes=False)
+
+    def loads(data: Union[str, bytes]) -> Any:
+        try:
+            return ujson.loads(data)
+        except ValueError as e:
+            # ujson не наследует ошибку разбора от json.JSONDecodeError
+            raise json.JSONDecodeError(str(e), data if isinstance(data, str) else repr(data), 0) from e
+
+    return JsonCodec('ujson', dumps, loads)
+
+
+_FACTORIES = {
+    'orjson': _orjson_codec,
+    'ujson': _ujson_codec,
+    'json': _stdlib_codec,
+}
+
+_codec: Optional[JsonCodec] = None
+
+
+def available_codecs() -> list[JsonCodec]:
+    """ Все установленные кодеки в порядке предпочтения """
+    return [codec for codec in (factory() for factory in _FACTORIES.values()) if codec is not None]
+
+
+def get_codec() -> JsonCodec:
+    """ Текущий кодек. По умолчанию - самый быстрый из установленных: orjson, ujson или json """
+    global _codec
+    if _codec is None:
+        _codec = available_codecs()[0]
+    return _codec
+
+
+def set_codec(codec: Union[str, JsonCodec]) -> JsonCodec:
+    """
+    Выбрать кодек для всей библиотеки.
+
+    :param codec: название ('orjson', 'ujson', 'json') или объект :class:`JsonCodec`
+    """
+    global _codec
+    if isinstance(codec, str):
+        try:
+            factory = _FACTORIES[codec]
+        except KeyError:
+            raise ValueError(f"Unknown JSON codec {codec!r}") from None
+        created = factory()
+        if created is None:
+            raise ImportError(f"JSON codec {codec!r} is not installed")
+        codec = created
+    _codec = codec
+    return codec
@@ -0,0 +1,166 @@
+import asyncio
+import logging
+
+from typing import TYPE_CHECKING, Any, Callable, Optional
+
+from core.codec import get_codec
+
+if TYPE_CHECKING:
+    from core.vk_api import VkApi
+
+#: Максимальное количество вызовов API в одном запросе execute
+MAX_EXECUTE_CALLS = 25
+
+
+def _normalize_value(value: Any) -> Any:
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return ','.join(str(_normalize_value(item)) for item in value)
+    return value
+
+
+def normalize_params(params: dict) -> dict:
+    """
+    Привести параметры метода к виду, в котором их принимает API: ``True``/``False`` - к 1/0,
+    списки - к строке через запятую. Параметры со значением None отбрасываются.
+    """
+    return {k: _normalize_value(v) for k, v in params.items() if v is not None}
+
+
+def compile_execute_code(calls: list[tuple[str, dict]], dumps: Optional[Callable[[Any], str]] = None) -> str:
+    """
+    Собрать VKScript для метода execute из списка вызовов.
+
+    :param calls: список пар (метод, параметры)
+    :param dumps: функция сериализации JSON (по умолчанию - текущего кодека)
+    :return: код, возвращающий массив результатов в порядке вызовов
+    """
+    dumps = dumps or get_codec().dumps
+    parts = []
+    for method, params in calls:
+        parts.append(f"API.{method}({dumps(normalize_params(params))})")
+    return f"return [{','.join(parts)}];"
+
+
+def split_execute_response(response: dict, size: int) -> list[dict]:
+    """
+    Разделить ответ execute, собранного :func:`compile_execute_code`, на результаты вызовов.
+
+    Вызовы, завершившиеся ошибкой, получают по порядку ошибки из ``execute_errors``.
+    Ошибка всего запроса execute становится результатом каждого вызова.
+
+    :param response: ответ метода execute
+    :param size: количество вызовов
+    :return: ``{'response': ...}`` или ``{'error': ...}`` для каждого вызова
+    """
+    if 'error' in response:
+        return [{'error': response['error']}] * size
+
+    results = response.get('response') or []
+    errors = iter(response.get('execute_errors', []))
+
+    split = []
+    for i in range(size):
+        result = results[i] if i < len(results) else False
+        if result is False:
+            error = next(errors, None)
+            if error is not None:
+                split.append({'error': error})
+                continue
+        split.append({'response': result})
+
+    if len(results) != size:
+        logging.warning("Execute returned %s results for %s calls", len(results), size)
+
+    return split
+
+
+class ExecuteBatcher:
+    """
+    Объединяет вызовы методов API, сделанные в течение короткого окна, в один запрос execute.
+
+    Каждый вызывающий получает свой результат в том же виде, в каком его вернул бы
+    :meth:`VkApi.method`: ``{'response': ...}`` или ``{'error': ...}``.
+
+    :param vk: объект :class:`VkApi`
+    :param window: время накопления вызовов в секундах
+    :param max_calls: максимальное количество вызовов в одном execute
+    """
+
+    __slots__ = ('vk', 'window', 'max_calls', '_pending', '_handle', '_tasks', 'batches', 'calls')
+
+    def __init__(self, vk: "VkApi", window: float = 0.05, max_calls: int = MAX_EXECUTE_CALLS):
+        if not 1 <= max_calls <= MAX_EXECUTE_CALLS:
+            raise ValueError(f"max_calls must be between 1 and {MAX_EXECUTE_CALLS}")
+        self.vk = vk
+        self.window = window
+        self.max_calls = max_calls
+
+        self._pending: list[tuple[str, dict, asyncio.Future]] = []
+        self._handle: Optional[asyncio.TimerHandle] = None
+        self._tasks: set[asyncio.Task] = set()
+
+        # Счётчики
+        self.batches = 0
+        self.calls = 0
+
+    async def call(self, method: str, params: dict) -> dict:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((method, params, future))
+
+        if len(self._pending) >= self.max_calls:
+            self.flush()
+        elif self._handle is None:
+            self._handle = loop.call_later(self.window, self.flush)
+
+        return await future
+
+    def flush(self) -> None:
+        """ Немедленно отправить накопленные вызовы """
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+
+        while self._pending:
+            batch = self._pending[:self.max_calls]
+            del self._pending[:self.max_calls]
+            task = asyncio.create_task(self._execute(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def close(self) -> None:
+        """ Отправить накопленные вызовы и дождаться выполнения всех запросов """
+        self.flush()
+        while self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _execute(self, batch: list[tuple[str, dict, asyncio.Future]]) -> None:
+        self.batches += 1
+        self.calls += len(batch)
+
+        if len(batch) == 1:
+            method, params, future = batch[0]
+            try:
+                result = await self.vk.request(method, params)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            else:
+                if not future.done():
+                    future.set_result(result)
+            return
+
+        try:
+            code = compile_execute_code([(method, params) for method, params, _ in batch], self.vk.codec.dumps)
+            response = await self.vk.request('execute', {'code': code})
+        except Exception as e:
+            for *_, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for future, result in zip((future for *_, future in batch), split_execute_response(response, len(batch))):
+            if not future.done():
+                future.set_result(result)
@@ -0,0 +1,149 @@
+import asyncio
+import contextvars
+import functools
+import pickle
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from enum import Enum
+from typing import Any, Callable, Optional, TypeVar
+
+CallbackT = TypeVar("CallbackT", bound=Callable[..., Any])
+
+#: Размер пула потоков по умолчанию
+DEFAULT_THREAD_WORKERS = 8
+
+_POLICY_ATTR = '__vk_execution_policy__'
+
+
+class ExecutionPolicy(Enum):
+    """ Способ выполнения синхронных обработчиков и фильтров """
+
+    #: Вызов прямо в цикле событий. Только для быстрых неблокирующих функций
+    INLINE = 'inline'
+
+    #: Выделенный пул потоков для блокирующих функций
+    THREAD = 'thread'
+
+    #: Пул процессов для функций, нагружающих процессор.
+    #: Функция должна сериализоваться через pickle (объявлена на уровне модуля).
+    #: Вместо события функция получает его исходный словарь ``event.raw``,
+    #: а из контекста - только значения простых типов
+    PROCESS = 'process'
+
+
+#: Типы значений контекста, передаваемые в пул процессов
+_PROCESS_VALUE_TYPES = (str, int, float, bool, type(None), bytes, dict, list, tuple, set, frozenset)
+
+
+class _Executors:
+    thread_workers: int = DEFAULT_THREAD_WORKERS
+    process_workers: Optional[int] = None
+    thread_pool: Optional[ThreadPoolExecutor] = None
+    process_pool: Optional[ProcessPoolExecutor] = None
+
+
+def configure_executors(thread_workers: int = DEFAULT_THREAD_WORKERS, process_workers: Optional[int] = None) -> None:
+    """
+    Настроить пулы для синхронных обработчиков. Вызывается до запуска бота.
+
+    :param thread_workers: размер пула потоков для :attr:`ExecutionPolicy.THREAD`
+    :param process_workers: размер пула процессов для :attr:`ExecutionPolicy.PROCESS`
+        (None - по количеству процессоров)
+    """
+    shutdown_executors(wait=False)
+    _Executors.thread_workers = thread_workers
+    _Executors.process_workers = process_workers
+
+
+def shutdown_executors(wait: bool = True) -> None:
+    """ Остановить созданные пулы """
+    if _Executors.thread_pool is not None:
+        _Executors.thread_pool.shutdown(wait=wait)
+        _Executors.thread_pool = None
+    if _Executors.process_pool is not None:
+        _Executors.process_pool.shutdown(wait=wait)
+        _Executors.process_pool = None
+
+
+def _get_executor(policy: ExecutionPolicy) -> Executor:
+    if policy is ExecutionPolicy.PROCESS:
+        if _Executors.process_pool is None:
+            _Executors.process_pool = ProcessPoolExecutor(max_workers=_Executors.process_workers)
+        return _Executors.process_pool
+
+    if _Executors.thread_pool is None:
+        _Executors.thread_pool = ThreadPoolExecutor(
+            max_workers=_Executors.thread_workers,
+            thread_name_prefix='vk-handler',
+        )
+    return _Executors.thread_pool
+
+
+def execution_policy(policy: ExecutionPolicy) -> Callable[[CallbackT], CallbackT]:
+    """
+    Декоратор, задающий способ выполнения синхронного обработчика или фильтра.
+
+    Пример::
+
+        @router.message(execution_policy(ExecutionPolicy.INLINE)(lambda event: event.from_user))
+    """
+
+    def wrapper(callback: CallbackT) -> CallbackT:
+        setattr(callback, _POLICY_ATTR, policy)
+        return callback
+
+    return wrapper
+
+
+#: Быстрая неблокирующая функция, выполняется прямо в цикле событий
+inline = execution_policy(ExecutionPolicy.INLINE)
+
+#: Блокирующая функция, выполняется в пуле потоков (поведение по умолчанию)
+blocking = execution_policy(ExecutionPolicy.THREAD)
+
+#: Функция, нагружающая процессор, выполняется в пуле процессов
+cpu_bound = execution_policy(ExecutionPolicy.PROCESS)
+
+
+def get_execution_policy(callback: Callable[..., Any]) -> ExecutionPolicy:
+    return getattr(callback, _POLICY_ATTR, ExecutionPolicy.THREAD)
+
+
+def check_process_callback(callback: Callable[..., Any]) -> None:
+    """
+    Проверить, что функцию можно выполнить в пуле процессов.
+
+    :raises TypeError: функция не сериализуется через pickle
+    """
+    try:
+        pickle.dumps(callback)
+    except Exception as e:
+        raise TypeError(
+            f"{callback!r} cannot be run with ExecutionPolicy.PROCESS: it must be picklable "
+            f"(a module-level function), got {e}"
+        ) from None
+
+
+def _to_process_arg(value: Any) -> Any:
+    # События содержат VkApi с открытой HTTP-сессией, в процесс передаётся только исходный словарь
+    raw = getattr(value, 'raw', None)
+    return raw if isinstance(raw, dict) else value
+
+
+async def run_sync(policy: ExecutionPolicy, callback: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """
+    Выполнить синхронную функцию в соответствии с политикой.
+    """
+    if policy is ExecutionPolicy.INLINE:
+        return callback(*args, **kwargs)
+
+    loop = asyncio.get_running_loop()
+    if policy is ExecutionPolicy.PROCESS:
+        args = tuple(_to_process_arg(arg) for arg in args)
+        kwargs = {name: value for name, value in kwargs.items() if isinstance(value, _PROCESS_VALUE_TYPES)}
+        return await loop.run_in_executor(_get_executor(policy), functools.partial(callback, *args, **kwargs))
+
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(
+        _get_executor(policy),
+        functools.partial(context.run, callback, *args, **kwargs),
+    )
@@ -1,46 +1,133 @@
-import asyncio
 import inspect
+import operator
 from dataclasses import dataclass, field
-from functools import partial
-from typing import Any, Callable
+from typing import Any, Callable, Hashable, NamedTuple, Optional
 
 from magic_filter import MagicFilter
+from magic_filter.operations import CallOperation, ComparatorOperation, GetAttributeOperation, GetItemOperation
 
 from core.handlers.base_filter import Filter
+from core.handlers.execution import ExecutionPolicy, check_process_callback, get_execution_policy, run_sync
 
 CallbackType = Callable[..., Any]
 
+# Общий пустой словарь для вызова без аргументов из контекста (распаковка ** всегда копирует)
+_NO_KWARGS: dict[str, Any] = {}
+
+
+class FilterIndex(NamedTuple):
+    """
+    Фильтр вида ``F.<путь> == <значение>``, разобранный для построения хэш-индекса.
+
+    :param signature: хэшируемое описание пути (одинаковое у фильтров с одинаковым путём)
+    :param path: фильтр, возвращающий значение по пути
+    :param value: значение, с которым сравнивается результат
+    """
+    signature: tuple
+    path: MagicFilter
+    value: Hashable
+
+
+def _operation_signature(operation: Any) -> Optional[tuple]:
+    if isinstance(operation, GetAttributeOperation):
+        return 'attr', operation.name
+    if isinstance(operation, GetItemOperation):
+        return 'item', operation.key
+    if isinstance(operation, CallOperation):
+        return 'call', tuple(operation.args), tuple(sorted(operation.kwargs.items()))
+    return None
+
+
+def build_filter_index(magic: MagicFilter) -> Optional[FilterIndex]:
+    """
+    Распознать фильтр сравнения на равенство одного атрибута события,
+    например ``F.payload.get("key") == "pri"``, ``F.message.text == "/start"`` или ``F.peer_id == 1``.
+
+    :return: :class:`FilterIndex` или None, если фильтр нельзя проиндексировать
+    """
+    operations = magic._operations
+    if len(operations) < 2:
+        return None
+
+    comparator = operations[-1]
+    if not isinstance(comparator, ComparatorOperation) or comparator.comparator is not operator.eq:
+        return None
+    # Если путь не удаётся пройти, при поиске в индексе получается None,
+    # поэтому сравнение с None проверяется обычным способом
+    if comparator.right is None:
+        return None
+
+    signature = []
+    for operation in operations[:-1]:
+        operation_signature = _operation_signature(operation)
+        if operation_signature is None:
+            return None
+        signature.append(operation_signature)
+
+    try:
+        signature_key = tuple(signature)
+        hash(signature_key)
+        hash(comparator.right)
+    except TypeError:
+        return None
+
+    return FilterIndex(signature_key, MagicFilter(operations=operations[:-1]), comparator.right)
+
 
 @dataclass
 class CallableObject:
     callback: CallbackType
     awaitable: bool = field(init=False)
-    params: set[str] = field(init=False)
+    params: tuple[str, ...] = field(init=False)
+    positional: int = field(init=False)
     varkw: bool = field(init=False)
+    policy: ExecutionPolicy = field(init=False, default=ExecutionPolicy.THREAD)
+    injected: dict[int, tuple[str, ...]] = field(init=False, default_factory=dict, repr=False)
 
     def __post_init__(self) -> None:
         callback = inspect.unwrap(self.callback)
         self.awaitable = inspect.isawaitable(callback) or inspect.iscoroutinefunction(callback)
-        spec = inspect.getfullargspec(callback)
-        self.params = {*spec.args, *spec.kwonlyargs}
-        self.varkw = spec.varkw is not None
-
-    def _prepare_kwargs(self, kwargs: dict[str, Any]) -> dict[str, Any]:
-        if self.varkw:
-            return kwargs
-
-        return {k: kwargs[k] for k in self.params if k in kwargs}
+        if self.policy is ExecutionPolicy.THREAD:
+            self.policy = get_execution_policy(self.callback)
+        if self.policy is ExecutionPolicy.PROCESS and not self.awaitable:
+            check_process_callback(self.callback)
+        # signature, в отличие от getfullargspec, не включает self методов и вызываемых объектов
+        parameters = inspect.signature(callback).parameters.values()
+        positional = [p.name for p in parameters if p.kind in (p.POSITIONAL_ONLY, p.POSITIONAL_OR_KEYWORD)]
+        self.params = (*positional, *(p.name for p in parameters if p.kind is p.KEYWORD_ONLY))
+        self.positional = len(positional)
+        self.varkw = any(p.kind is p.VAR_KEYWORD for p in parameters)
+
+    def injected_names(self, positional_args: int) -> tuple[str, ...]:
+        """
+        Имена параметров, которые заполняются из контекста события,
+        если первые ``positional_args`` аргументов переданы позиционно.
+        Вычисляются один раз для каждого количества позиционных аргументов.
+        """
+        names = self.injected.get(positional_args)
+        if names is None:
+            names = self.injected[positional_args] = self.params[min(positional_args, self.positional):]
+        return names
 
     async def call(self, *args: Any, **kwargs: Any) -> Any:
-        wrapped = partial(self.callback, *args, **self._prepare_kwargs(kwargs))
+        # Контекст передаётся без копирования, если callback принимает **kwargs,
+        # и не передаётся совсем, если callback не принимает из него ни одного имени
+        if not self.varkw:
+            names = self.injected.get(len(args))
+            if names is None:
+                names = self.injected_names(len(args))
+            kwargs = {name: kwargs[name] for name in names if name in kwargs} if names else _NO_KWARGS
         if self.awaitable:
-            return await wrapped()
-        return await asyncio.to_thread(wrapped)
+            return await self.callback(*args, **kwargs)
+        if self.policy is ExecutionPolicy.INLINE:
+            return self.callback(*args, **kwargs)
+        return await run_sync(self.policy, self.callback, *args, **kwargs)
 
 
 @dataclass
 class FilterObject(CallableObject):
     magic: MagicFilter | None = None
+    index: FilterIndex | None = field(init=False, default=None)
 
     def __post_init__(self) -> None:
         if isinstance(self.callback, MagicFilter):
@@ -48,6 +135,9 @@ class FilterObject(CallableObject):
             # только "CallOperation" вместо применения фильтра
             self.magic = self.callback
             self.callback = self.callback.resolve
+            self.index = build_filter_index(self.magic)
+            # Разрешение MagicFilter - только чтение атрибутов, выполняем без перехода в поток
+            self.policy = ExecutionPolicy.INLINE
 
         super().__post_init__()
 
@@ -59,6 +149,8 @@ class FilterObject(CallableObject):
 class HandlerObject(CallableObject):
     filters: list[FilterObject] | None = None
     flags: dict[str, Any] = field(default_factory=dict)
+    index: FilterIndex | None = field(init=False, default=None)
+    unindexed_filters: list[FilterObject] | None = field(init=False, default=None)
 
     def __post_init__(self) -> None:
         super().__post_init__()
@@ -66,10 +158,30 @@ class HandlerObject(CallableObject):
         if inspect.isclass(callback):
             self.awaitable = True
 
+        # Первый фильтр на равенство используется для хэш-индекса в EventObserver,
+        # для кандидатов из индекса он уже выполнен и проверяются только остальные
+        for event_filter in self.filters or ():
+            if event_filter.index is not None:
+                self.index = event_filter.index
+                self.unindexed_filters = [f for f in self.filters if f is not event_filter]
+                break
+
     async def check(self, *args: Any, **kwargs: Any) -> tuple[bool, dict[str, Any]]:
-        if not self.filters:
+        return await self._check(self.filters, *args, **kwargs)
+
+    async def check_unindexed(self, *args: Any, **kwargs: Any) -> tuple[bool, dict[str, Any]]:
+        """
+        Проверить фильтры, кроме проиндексированного (его выполнение гарантирует индекс).
+        """
+        return await self._check(self.unindexed_filters, *args, **kwargs)
+
+    @staticmethod
+    async def _check(
+            filters: list[FilterObject] | None, *args: Any, **kwargs: Any
+    ) -> tuple[bool, dict[str, Any]]:
+        if not filters:
             return True, kwargs
-        for event_filter in self.filters:
+        for event_filter in filters:
             check = await event_filter.call(*args, **kwargs)
             if not check:
                 return False, kwargs
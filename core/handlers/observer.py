@@ -1,8 +1,11 @@
+import heapq
 import logging
 import sys
 import traceback
 
-from typing import Any, Callable, Optional
+from typing import Any, Callable, Iterable, Optional
+
+from magic_filter import MagicFilter
 
 from core.bot.bot_events import VkBotEvent
 from core.handlers.base_filter import Filter
@@ -11,11 +14,30 @@ from core.handlers.responce import ResponseStatus
 
 CallbackType = Callable[..., Any]  # Повторяется 2 раза в проекте
 
+# Пути фильтров с таблицами "значение -> позиции обработчиков" и позиции обработчиков без индекса
+HandlerIndex = tuple[tuple[tuple[MagicFilter, dict[Any, list[int]]], ...], list[int]]
+
 
 class EventObserver:
-    def __init__(self) -> None:
+    def __init__(self, on_change: Optional[Callable[[], None]] = None) -> None:
+        """
+        :param on_change: вызывается при регистрации обработчиков и фильтров
+        """
         self.handlers: list[HandlerObject] = []
         self._handler = HandlerObject(callback=lambda: True, filters=[])
+        self._on_change = on_change
+        self._index: Optional[HandlerIndex] = None
+        self._index_built = False
+
+    def _changed(self) -> None:
+        self._index = None
+        self._index_built = False
+        if self._on_change is not None:
+            self._on_change()
+
+    @property
+    def has_root_filters(self) -> bool:
+        return bool(self._handler.filters)
 
     def filter(self, *filters: CallbackType) -> None:
         """
@@ -26,6 +48,7 @@ class EventObserver:
         if self._handler.filters is None:
             self._handler.filters = []
         self._handler.filters.extend([FilterObject(filter_) for filter_ in filters])
+        self._changed()
 
     def register(
             self,
@@ -57,20 +80,64 @@ class EventObserver:
                 flags=flags,
             )
         )
+        self._changed()
 
         return callback
 
     def check_root_filters(self, event: VkBotEvent, **kwargs: Any) -> Any:
         return self._handler.check(event, **kwargs)
 
+    def _build_index(self) -> Optional[HandlerIndex]:
+        paths: dict[tuple, tuple[MagicFilter, dict[Any, list[int]]]] = {}
+        unindexed: list[int] = []
+        for position, handler in enumerate(self.handlers):
+            if handler.index is None:
+                unindexed.append(position)
+                continue
+            signature, path, value = handler.index
+            if signature not in paths:
+                paths[signature] = (path, {})
+            paths[signature][1].setdefault(value, []).append(position)
+
+        if not paths:
+            return None
+        return tuple(paths.values()), unindexed
+
+    def _candidates(self, event: VkBotEvent) -> Iterable[HandlerObject]:
+        """
+        Обработчики, которые могут подойти событию, в порядке регистрации.
+        Обработчики с фильтром ``F.<путь> == <значение>`` выбираются по хэш-индексу.
+        """
+        if not self._index_built:
+            self._index = self._build_index()
+            self._index_built = True
+        if self._index is None:
+            return self.handlers
+
+        paths, unindexed = self._index
+        positions = [unindexed]
+        for path, table in paths:
+            try:
+                hits = table.get(path.resolve(event))
+            except Exception:  # Нехэшируемое значение или ошибка при получении атрибута
+                hits = None
+            if hits:
+                positions.append(hits)
+
+        handlers = self.handlers
+        return [handlers[position] for position in heapq.merge(*positions)]
+
     async def trigger(self, event: VkBotEvent, *args, **kwargs: Any) -> Optional[int]:
         """
         Передайте событие обработчикам.
         Обработчик будет вызван, когда будут пройдены все его фильтры.
         """
-        for handler in self.handlers:
+        for handler in self._candidates(event):
             kwargs["handler"] = handler
-            result, data = await handler.check(event, **kwargs)
+            if handler.index is not None and self._index is not None:
+                result, data = await handler.check_unindexed(event, **kwargs)
+            else:
+                result, data = await handler.check(event, **kwargs)
             if result:
                 kwargs.update(data)
                 try:
@@ -1,14 +1,31 @@
 from __future__ import annotations
 
-from typing import Any, Final, Generator, List, Optional
+from typing import Any, Final, Generator, List, NamedTuple, Optional, Union
 
 from core.bot.bot_events import VkBotEvent, VkBotEventType
 from core.handlers.observer import EventObserver
 from core.handlers.responce import ResponseStatus
+from core.user.user_events import Event, VkEventType
 
 INTERNAL_UPDATE_TYPES: Final[frozenset[str]] = frozenset({"update", "error"})
 
 
+class DispatchStep(NamedTuple):
+    """
+    Шаг плоской таблицы обработки событий.
+
+    :param router: маршрутизатор, которому принадлежит observer
+    :param observer: observer для данного типа события
+    :param end: индекс шага, следующего за поддеревом маршрутизатора
+        (куда перейти, если корневые фильтры не пройдены)
+    :param depth: глубина маршрутизатора среди шагов таблицы
+    """
+    router: Router
+    observer: EventObserver
+    end: int
+    depth: int
+
+
 class Router:
     """
     Маршрутизатор может перенаправлять обновления, и в него встроены такие типы обновлений, как сообщения, запросы обратного вызова,
@@ -18,6 +35,17 @@ class Router:
 
     - Метод - :obj:`router.<event_type>.register(handler, <filters, ...>)`
     - Декторатор - :obj:`@router.<event_type>(<filters, ...>)`
+
+    Для каждого значения :class:`VkBotEventType` есть observer с именем в нижнем регистре
+    (:obj:`router.wall_post_new`, :obj:`router.group_join`, ...),
+    :obj:`router.message` и :obj:`router.callback_query` - псевдонимы для `message_new` и `message_event`.
+
+    События User Long Poll (:class:`VkLongPoll`) имеют тип :class:`VkEventType`, для каждого
+    значения есть observer с префиксом ``user_`` (:obj:`router.user_message_new`,
+    :obj:`router.user_message_edit`, ...).
+
+    Дерево маршрутизаторов при первом событии каждого типа компилируется в плоскую таблицу
+    шагов, которая сбрасывается при изменении дерева (:meth:`include_router`, регистрация обработчиков).
     """
 
     def __init__(self, *, name: Optional[str] = None) -> None:
@@ -30,19 +58,26 @@ class Router:
         self._parent_router: Optional[Router] = None
         self.sub_routers: list[Router] = []
 
+        self._dispatch_table: dict[Union[str, VkEventType], tuple[DispatchStep, ...]] = {}
+
         # Observers
-        self.message = EventObserver()
-        self.callback_query = EventObserver()
+        self.observers: dict[Union[str, VkEventType], EventObserver] = {}
+        for event_type in VkBotEventType:
+            observer = EventObserver(on_change=self.invalidate)
+            self.observers[event_type.value] = observer
+            setattr(self, event_type.name.lower(), observer)
+        for user_event_type in VkEventType:
+            observer = EventObserver(on_change=self.invalidate)
+            self.observers[user_event_type] = observer
+            setattr(self, 'user_' + user_event_type.name.lower(), observer)
+
+        self.message = self.observers[VkBotEventType.MESSAGE_NEW.value]
+        self.callback_query = self.observers[VkBotEventType.MESSAGE_EVENT.value]
         # self.errors = EventObserver()
 
         self.startup = EventObserver()
         self.shutdown = EventObserver()
 
-        self.observers: dict[str, EventObserver] = {
-            VkBotEventType.MESSAGE_NEW.value: self.message,
-            VkBotEventType.MESSAGE_EVENT.value: self.callback_query,
-        }
-
     def __str__(self) -> str:
         return f"{type(self).__name__} {self.name!r}"
 
@@ -65,51 +100,91 @@ class Router:
 
         for router in self.chain_tail:
             for update_name, observer in router.observers.items():
+                # События User Long Poll не относятся к настройкам Bots Long Poll
+                if not isinstance(update_name, str):
+                    continue
                 if observer.handlers and update_name not in skip_events:
                     handlers_in_use.add(update_name)
 
         return list(sorted(handlers_in_use))  # NOQA: C413
 
-    async def propagate_event(self, update_type: str, event: VkBotEvent, **kwargs: Any) -> Any:
-        kwargs.update(event_router=self)
-        observer = self.observers.get(update_type)
+    def invalidate(self) -> None:
+        """
+        Сбросить скомпилированные таблицы этого маршрутизатора и всех его родителей.
+        """
+        for router in self.chain_head:
+            router._dispatch_table.clear()
+
+    def _compile(self, update_type: Union[str, VkEventType]) -> tuple[DispatchStep, ...]:
+        steps: list[list[Any]] = []
+
+        def visit(router: Router, depth: int) -> None:
+            observer = router.observers.get(update_type)
+            index = None
+            if observer and (observer.handlers or observer.has_root_filters):
+                index = len(steps)
+                steps.append([router, observer, 0, depth])
+                depth += 1
+            for sub_router in router.sub_routers:
+                visit(sub_router, depth)
+            if index is not None:
+                steps[index][2] = len(steps)
+
+        visit(self, 0)
+        return tuple(DispatchStep(*step) for step in steps)
+
+    def compile(self) -> None:
+        """
+        Заранее скомпилировать таблицы для всех типов событий.
+        """
+        for update_type in self.observers:
+            self._dispatch_table[update_type] = self._compile(update_type)
 
-        async def _wrapped(event: VkBotEvent, **data: Any) -> Any:
-            return await self._propagate_event(
-                observer=observer, update_type=update_type, event=event, **data
-            )
-        return await _wrapped(event, **kwargs)
-
-    async def _propagate_event(
-        self,
-        observer: Optional[EventObserver],
-        update_type: str,
-        event: VkBotEvent,
-        **kwargs: Any,
+    def get_dispatch_table(self, update_type: Union[str, VkEventType]) -> tuple[DispatchStep, ...]:
+        table = self._dispatch_table.get(update_type)
+        if table is None:
+            table = self._dispatch_table[update_type] = self._compile(update_type)
+        return table
+
+    async def propagate_event(
+            self, update_type: Union[str, VkEventType], event: Union[VkBotEvent, Event], **kwargs: Any
     ) -> Any:
-        response = ResponseStatus.UNHANDLED
-        if observer:
+        table = self.get_dispatch_table(update_type)
+        kwargs.pop("event_router", None)
+
+        # Контекст для каждой глубины: данные корневых фильтров маршрутизатора
+        # доступны только его дочерним маршрутизаторам
+        contexts = [kwargs]
+        size = len(table)
+        i = 0
+        while i < size:
+            router, observer, end, depth = table[i]
+            context = contexts[depth]
+
             # Проверьте глобально определенные фильтры, прежде чем будет проверен любой другой обработчик.
             # Этот флажок установлен здесь вместо метода `trigger`, чтобы добавить возможность
             # передавать контекст обработчикам из глобальных фильтров.
-            result, data = await observer.check_root_filters(event, **kwargs)
-            if not result:
-                return ResponseStatus.UNHANDLED
-            kwargs.update(data)
-
-            response = await observer.trigger(event, **kwargs)
+            if observer.has_root_filters:
+                result, data = await observer.check_root_filters(event, event_router=router, **context)
+                if not result:
+                    i = end
+                    continue
+                data.pop("event_router", None)
+                context = data
+
+            del contexts[depth + 1:]
+            contexts.append(context)
+
+            response = await observer.trigger(event, event_router=router, **context)
             if response is ResponseStatus.REJECTED:  # pragma: no cover
                 # Возможно только в том случае, если какой-либо обработчик возвращает ОТКЛОНЕННЫЙ результат
-                return ResponseStatus.UNHANDLED
+                i = end
+                continue
             if response is not ResponseStatus.UNHANDLED:
                 return response
+            i += 1
 
-        for router in self.sub_routers:
-            response = await router.propagate_event(update_type=update_type, event=event, **kwargs)
-            if response is not ResponseStatus.UNHANDLED:
-                break
-
-        return response
+        return ResponseStatus.UNHANDLED
 
     @property
     def chain_head(self) -> Generator[Router, None, None]:
@@ -168,6 +243,7 @@ class Router:
                 f"router should be instance of Router not {type(router).__class__.__name__}"
             )
         router.parent_router = self
+        self.invalidate()
         return router
 
     def include_routers(self, *routers: Router) -> None:
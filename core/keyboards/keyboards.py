@@ -1,17 +1,25 @@
 import json
+import re
 
+from collections import OrderedDict
 from enum import Enum
+from typing import Any
+
+from core.codec import get_codec
 
 MAX_BUTTONS_ON_LINE = 5
 MAX_DEFAULT_LINES = 10
 MAX_INLINE_LINES = 6
 
 
-def sjson_dumps(*args, **kwargs):
+def sjson_dumps(obj, **kwargs):
+    if not kwargs:
+        return get_codec().dumps(obj)
+
     kwargs['ensure_ascii'] = False
     kwargs['separators'] = (',', ':')
 
-    return json.dumps(*args, **kwargs)
+    return json.dumps(obj, **kwargs)
 
 
 class VkKeyboardColor(Enum):
@@ -75,6 +83,13 @@ class VkKeyboard(object):
         """ Получить json клавиатуры """
         return sjson_dumps(self.keyboard)
 
+    def freeze(self):
+        """ Получить неизменяемую копию клавиатуры, json которой вычисляется один раз
+
+        :rtype: FrozenKeyboard
+        """
+        return FrozenKeyboard(self.get_keyboard())
+
     @classmethod
     def get_empty_keyboard(cls):
         """ Получить json пустой клавиатуры.
@@ -298,3 +313,111 @@ class VkKeyboard(object):
             raise ValueError(f'Max {MAX_DEFAULT_LINES} lines for default keyboard')
 
         self.lines.append([])
+
+
+class FrozenKeyboard(object):
+    """ Неизменяемая клавиатура с заранее сериализованным json.
+    Создаётся через :meth:`VkKeyboard.freeze` или :meth:`KeyboardTemplate.render`.
+
+    :param json: json клавиатуры
+    :type json: str
+    """
+
+    __slots__ = ('json',)
+
+    def __init__(self, json):
+        self.json = json
+
+    def get_keyboard(self):
+        """ Получить json клавиатуры """
+        return self.json
+
+    def __eq__(self, other):
+        return isinstance(other, FrozenKeyboard) and self.json == other.json
+
+    def __hash__(self):
+        return hash(self.json)
+
+    def __repr__(self):
+        return f'<FrozenKeyboard({self.json})>'
+
+
+def _escape_in_string(value):
+    """ Представление json-фрагмента внутри json-строки (payload кнопки хранится как строка) """
+    return sjson_dumps(value)[1:-1]
+
+
+class KeyboardTemplate(object):
+    """ Шаблон клавиатуры, у которой различаются только значения в payload.
+
+    Клавиатура сериализуется один раз, при отрисовке в готовый json подставляются только значения полей.
+    Результаты кэшируются по значениям полей.
+
+    Пример::
+
+        template = KeyboardTemplate(keyboard)  # payload={'post_id': KeyboardTemplate.field('post_id')}
+        await event.answer("Пост", keyboard=template.render(post_id=42))
+
+    :param keyboard: клавиатура, в payload которой использованы поля :meth:`field`
+    :type keyboard: VkKeyboard
+    :param cache_size: максимальное количество закэшированных клавиатур
+    :type cache_size: int
+    """
+
+    __slots__ = ('fragments', 'fields', 'cache_size', '_cache')
+
+    _FIELD_MARK = '@@'
+    # Поле в payload - строка '"@@name@@"', экранированная ещё раз внутри json клавиатуры
+    _FIELD_RE = re.compile(re.escape(_escape_in_string('"')) + r'@@([A-Za-z_][A-Za-z0-9_]*)@@'
+                           + re.escape(_escape_in_string('"')))
+
+    def __init__(self, keyboard, cache_size=1024):
+        parts = self._FIELD_RE.split(keyboard.get_keyboard())
+        self.fragments = parts[::2]
+        self.fields = tuple(parts[1::2])
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+
+    @classmethod
+    def field(cls, name):
+        """ Поле шаблона для использования в качестве значения в payload
+
+        :param name: имя поля (идентификатор Python)
+        :type name: str
+        """
+        if not name.isidentifier():
+            raise ValueError(f'Field name must be an identifier, got {name!r}')
+        return f'{cls._FIELD_MARK}{name}{cls._FIELD_MARK}'
+
+    def _render(self, values):
+        parts = [self.fragments[0]]
+        for name, fragment in zip(self.fields, self.fragments[1:]):
+            parts.append(_escape_in_string(sjson_dumps(values[name])))
+            parts.append(fragment)
+        return FrozenKeyboard(''.join(parts))
+
+    def render(self, **values: Any):
+        """ Получить клавиатуру с подставленными значениями полей
+
+        :rtype: FrozenKeyboard
+        """
+        missing = set(self.fields).difference(values)
+        if missing:
+            raise KeyError(f'Missing template fields: {", ".join(sorted(missing))}')
+
+        try:
+            # Тип входит в ключ: 1 == True, но сериализуются они по-разному
+            key = tuple(sorted((name, type(value), value) for name, value in values.items()))
+            hash(key)
+        except TypeError:
+            return self._render(values)
+
+        keyboard = self._cache.get(key)
+        if keyboard is not None:
+            self._cache.move_to_end(key)
+            return keyboard
+
+        keyboard = self._cache[key] = self._render(values)
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return keyboard
@@ -0,0 +1,224 @@
+import asyncio
+import logging
+
+from typing import TYPE_CHECKING, Any, Hashable, Iterable, Optional, Union
+
+from core.cache import ResponseCache
+
+if TYPE_CHECKING:
+    from core.vk_api import VkApi
+
+
+class BatchLoadError(Exception):
+    """
+    Пакетный запрос завершился ошибкой VK API.
+
+    :ivar error: ошибка из ответа API
+    """
+
+    def __init__(self, method: str, error: dict):
+        super().__init__(f"{method} failed: {error.get('error_msg')} ({error.get('error_code')})")
+        self.error = error
+
+
+class BatchLoader:
+    """
+    Объединяет запросы объектов по id, сделанные за одну итерацию цикла событий,
+    в один вызов метода API.
+
+    ``await loader.load(id)`` из множества одновременно работающих обработчиков
+    приводит к одному запросу (или нескольким, если id больше ``MAX_BATCH``).
+    Найденные объекты кэшируются на ``ttl`` секунд.
+
+    Если в запросе есть короткие имена, в ``fields`` добавляется ``screen_name``,
+    иначе объект нельзя сопоставить с запрошенным именем. Если метод отклонил
+    пакет из-за неверного id, пакет делится пополам и запрашивается заново,
+    пока ошибка не останется только у неверных id.
+
+    :param vk: объект :class:`VkApi`
+    :param params: дополнительные параметры метода (например, ``fields``)
+    :param ttl: время жизни объектов в кэше в секундах (0 - без кэша)
+    :param cache_size: максимальное количество объектов в кэше
+    """
+
+    __slots__ = ('vk', 'params', 'ttl', 'cache', '_pending', '_scheduled', '_tasks', 'batches', 'loads')
+
+    #: Метод API
+    METHOD: str = ''
+    #: Параметр метода со списком id
+    IDS_PARAM: str = ''
+    #: Максимальное количество id в одном вызове
+    MAX_BATCH: int = 100
+    #: Коды ошибок, означающие неверный id в запросе
+    INVALID_ID_ERRORS: frozenset[int] = frozenset({100})
+
+    def __init__(self, vk: "VkApi", params: Optional[dict] = None, ttl: float = 300, cache_size: int = 10000):
+        self.vk = vk
+        self.params = params or {}
+        self.ttl = ttl
+        self.cache = ResponseCache({self.METHOD: ttl}, cache_size) if ttl else None
+
+        self._pending: dict[Hashable, asyncio.Future] = {}
+        self._scheduled = False
+        self._tasks: set[asyncio.Task] = set()
+
+        # Счётчики
+        self.batches = 0
+        self.loads = 0
+
+    @staticmethod
+    def _normalize(key: Union[int, str]) -> Hashable:
+        if isinstance(key, str):
+            if key.lstrip('-').isdigit():
+                return int(key)
+            # Короткие имена не зависят от регистра
+            return key.lower()
+        return key
+
+    @staticmethod
+    def _items(response: Any) -> list[dict]:
+        """ Объекты из ответа метода """
+        return response or []
+
+    @staticmethod
+    def _keys(item: dict) -> Iterable[Hashable]:
+        """ Ключи, по которым объект мог быть запрошен """
+        yield item['id']
+        screen_name = item.get('screen_name')
+        if screen_name:
+            yield screen_name.lower()
+
+    async def load(self, key: Union[int, str]) -> Optional[dict]:
+        """
+        Загрузить объект.
+
+        :param key: id или короткое имя
+        :return: объект или None, если он не найден
+        :raises BatchLoadError: метод вернул ошибку
+        """
+        key = self._normalize(key)
+        self.loads += 1
+
+        if self.cache is not None:
+            item = self.cache.get((self.METHOD, key))
+            if item is not None:
+                self.cache.hits += 1
+                return item
+
+        future = self._pending.get(key)
+        if future is None:
+            future = self._pending[key] = asyncio.get_running_loop().create_future()
+            if not self._scheduled:
+                self._scheduled = True
+                asyncio.get_running_loop().call_soon(self._dispatch)
+        return await asyncio.shield(future)
+
+    async def load_many(self, keys: Iterable[Union[int, str]]) -> list[Optional[dict]]:
+        """ Загрузить несколько объектов. Порядок результатов совпадает с порядком ``keys`` """
+        return list(await asyncio.gather(*(self.load(key) for key in keys)))
+
+    def _dispatch(self) -> None:
+        self._scheduled = False
+        pending = list(self._pending.items())
+        self._pending.clear()
+        if self.cache is not None:
+            self.cache.misses += len(pending)
+        for start in range(0, len(pending), self.MAX_BATCH):
+            task = asyncio.create_task(self._load_batch(dict(pending[start:start + self.MAX_BATCH])))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def close(self) -> None:
+        """ Дождаться выполнения всех запросов """
+        while self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def _params(self, keys: Iterable[Hashable]) -> dict:
+        """ Параметры вызова метода для ``keys`` """
+        params = {**self.params, self.IDS_PARAM: ','.join(map(str, keys))}
+        if any(isinstance(key, str) for key in keys):
+            fields = params.get('fields') or ''
+            if isinstance(fields, str):
+                fields = fields.split(',') if fields else []
+            if 'screen_name' not in fields:
+                params['fields'] = ','.join([*fields, 'screen_name'])
+        return params
+
+    async def _load_batch(self, batch: dict[Hashable, asyncio.Future]) -> None:
+        self.batches += 1
+
+        try:
+            response = await self.vk.method(self.METHOD, self._params(batch))
+            error = response.get('error')
+            if error is not None:
+                if len(batch) > 1 and error.get('error_code') in self.INVALID_ID_ERRORS:
+                    # Неизвестно, какой id неверный: запрашиваем половины отдельно
+                    keys = list(batch)
+                    middle = len(keys) // 2
+                    await asyncio.gather(
+                        self._load_batch({key: batch[key] for key in keys[:middle]}),
+                        self._load_batch({key: batch[key] for key in keys[middle:]}),
+                    )
+                    return
+                raise BatchLoadError(self.METHOD, error)
+            items = self._items(response.get('response'))
+        except Exception as e:
+            logging.warning("Batch %s of %s ids failed: %r", self.METHOD, len(batch), e)
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+                    future.exception()
+            return
+
+        for item in items:
+            for key in self._keys(item):
+                if self.cache is not None:
+                    self.cache.put((self.METHOD, key), self.ttl, item)
+                future = batch.get(key)
+                if future is not None and not future.done():
+                    future.set_result(item)
+
+        for future in batch.values():
+            if not future.done():
+                future.set_result(None)
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {
+            'loads': self.loads,
+            'batches': self.batches,
+            **(self.cache.stats if self.cache is not None else {}),
+        }
+
+
+class UserLoader(BatchLoader):
+    """ Пакетная загрузка пользователей через `users.get` """
+
+    __slots__ = ()
+
+    METHOD = 'users.get'
+    IDS_PARAM = 'user_ids'
+    MAX_BATCH = 1000
+    INVALID_ID_ERRORS = frozenset({100, 113})
+
+
+class GroupLoader(BatchLoader):
+    """ Пакетная загрузка сообществ через `groups.getById`. Отрицательные id приводятся к положительным """
+
+    __slots__ = ()
+
+    METHOD = 'groups.getById'
+    IDS_PARAM = 'group_ids'
+    MAX_BATCH = 500
+
+    @staticmethod
+    def _normalize(key: Union[int, str]) -> Hashable:
+        key = BatchLoader._normalize(key)
+        return abs(key) if isinstance(key, int) else key
+
+    @staticmethod
+    def _items(response: Any) -> list[dict]:
+        # Начиная с версии 5.139 метод возвращает объект с полем groups
+        if isinstance(response, dict):
+            return response.get('groups') or []
+        return response or []
@@ -0,0 +1,232 @@
+import asyncio
+import json
+import logging
+import random
+import time
+
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional
+
+import aiohttp
+from aiohttp.web_exceptions import HTTPError
+
+from core.retry import CircuitOpenError
+
+
+class LongPollCheckpoint:
+    """
+    Позиция long poll после очередного ответа сервера.
+    Выдаётся :func:`listen_events` после всех событий этого ответа.
+
+    :param state: состояние long poll (см. :meth:`VkBotLongPoll.get_state`)
+    """
+
+    __slots__ = ('state',)
+
+    def __init__(self, state: dict[str, Any]):
+        self.state = state
+
+    def __repr__(self):
+        return f'<LongPollCheckpoint({self.state})>'
+
+
+class ReconnectPolicy:
+    """
+    Правила переподключения long poll и статистика соединения.
+
+    Ошибки сети и ошибки получения сервера не прерывают :func:`listen_events`:
+    запрос повторяется с растущей задержкой, а начиная со второй ошибки подряд
+    перед повтором запрашивается новый сервер. Ключ обновляется заранее,
+    не дожидаясь ответа сервера об его истечении.
+
+    :param retry_delay: начальная задержка перед повтором в секундах
+    :param max_retry_delay: максимальная задержка перед повтором в секундах
+    :param max_failures: после скольких ошибок подряд прекратить попытки (None - никогда)
+    :param key_ttl: через сколько секунд обновлять ключ (None - только по ответу сервера)
+    """
+
+    __slots__ = (
+        'retry_delay', 'max_retry_delay', 'max_failures', 'key_ttl',
+        'failures', 'down_since', 'key_updated_at', 'last_error',
+        'reconnects', 'errors', 'downtime', 'key_refreshes',
+    )
+
+    #: Ошибки, после которых long poll переподключается. Некорректный JSON - это ответ
+    #: прокси или балансировщика вместо сервера (ошибки разбора всех кодеков наследуют JSONDecodeError)
+    ERRORS = (
+        aiohttp.ClientError, asyncio.TimeoutError, ConnectionError, HTTPError, CircuitOpenError,
+        json.JSONDecodeError,
+    )
+
+    def __init__(
+            self,
+            retry_delay: float = 1,
+            max_retry_delay: float = 60,
+            max_failures: Optional[int] = None,
+            key_ttl: Optional[float] = 3600,
+    ):
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.max_failures = max_failures
+        self.key_ttl = key_ttl
+
+        # Текущее состояние
+        self.failures = 0
+        self.down_since: Optional[float] = None
+        self.key_updated_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+        # Счётчики
+        self.reconnects = 0
+        self.errors = 0
+        self.downtime = 0.0
+        self.key_refreshes = 0
+
+    def key_updated(self) -> None:
+        """ Отметить получение нового ключа """
+        self.key_updated_at = time.monotonic()
+
+    @property
+    def key_expired(self) -> bool:
+        return (
+            self.key_ttl is not None
+            and self.key_updated_at is not None
+            and time.monotonic() - self.key_updated_at >= self.key_ttl
+        )
+
+    def failure(self, exception: BaseException) -> Optional[float]:
+        """
+        Учесть ошибку.
+
+        :return: задержка перед повтором или None, если попытки нужно прекратить
+        """
+        if not isinstance(exception, self.ERRORS):
+            return None
+
+        self.errors += 1
+        self.failures += 1
+        self.last_error = repr(exception)
+        if self.down_since is None:
+            self.down_since = time.monotonic()
+
+        if self.max_failures is not None and self.failures >= self.max_failures:
+            return None
+
+        delay = min(self.retry_delay * 2 ** (self.failures - 1), self.max_retry_delay)
+        return random.uniform(delay / 2, delay)
+
+    def success(self) -> None:
+        """ Учесть успешный ответ сервера """
+        if self.down_since is None:
+            return
+        self.downtime += time.monotonic() - self.down_since
+        self.reconnects += 1
+        self.failures = 0
+        self.down_since = None
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        return {
+            'connected': self.down_since is None,
+            'reconnects': self.reconnects,
+            'errors': self.errors,
+            'downtime': self.downtime + (time.monotonic() - self.down_since if self.down_since is not None else 0),
+            'key_refreshes': self.key_refreshes,
+            'last_error': self.last_error,
+        }
+
+
+class _Prepare:
+    __slots__ = ('task',)
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+
+
+class _Failure:
+    __slots__ = ('exception',)
+
+    def __init__(self, exception: BaseException):
+        self.exception = exception
+
+
+async def listen_events(
+        longpoll,
+        queue_size: int = 1000,
+        checkpoints: bool = False,
+        fetch_events: Optional[Callable[[], Awaitable[list]]] = None,
+        prepare: Optional[Callable[[list], Awaitable[None]]] = None,
+) -> AsyncIterator[Any]:
+    """
+    Бесконечно получать события от long poll сервера.
+
+    Следующий запрос к серверу отправляется сразу после получения предыдущего ответа,
+    не дожидаясь обработки событий. Полученные события копятся в очереди размером
+    ``queue_size``; когда очередь заполнена, запросы к серверу приостанавливаются.
+
+    Переподключение после ошибок выполняется по правилам ``longpoll.reconnect``
+    (см. :class:`ReconnectPolicy`), в том числе при получении сервера перед первым запросом.
+    Если позиция уже задана через ``set_state``, сервер получается без её сброса.
+
+    :param longpoll: объект :class:`VkBotLongPoll` или :class:`VkLongPoll`
+    :param queue_size: максимальное количество полученных, но не выданных событий
+    :param checkpoints: после событий каждого ответа выдавать :class:`LongPollCheckpoint`
+    :param fetch_events: функция получения событий (по умолчанию ``longpoll.get_events``)
+    :param prepare: дополнительная обработка событий ответа (например, предзагрузка сообщений).
+        Выполняется в фоне, не задерживая следующий запрос к серверу;
+        события ответа выдаются после её завершения
+    """
+    fetch_events = fetch_events or longpoll.get_events
+    reconnect = getattr(longpoll, 'reconnect', None) or ReconnectPolicy()
+
+    queue: asyncio.Queue = asyncio.Queue(queue_size)
+
+    async def poll() -> list:
+        while True:
+            try:
+                if not longpoll.url:
+                    # Позиция, восстановленная из хранилища (см. set_state), сохраняется
+                    await longpoll.update_longpoll_server(update_ts=longpoll.ts is None)
+                elif reconnect.failures > 1:
+                    await longpoll.update_longpoll_server(update_ts=False)
+                elif reconnect.key_expired:
+                    await longpoll.update_longpoll_server(update_ts=False)
+                    reconnect.key_refreshes += 1
+                events = await fetch_events()
+            except Exception as e:
+                delay = reconnect.failure(e)
+                if delay is None:
+                    raise
+                logging.warning("Long poll request failed, retrying in %.1fs: %r", delay, e)
+                await asyncio.sleep(delay)
+            else:
+                reconnect.success()
+                return events
+
+    async def fetch() -> None:
+        try:
+            while True:
+                events = await poll()
+                if prepare is not None and events:
+                    await queue.put(_Prepare(asyncio.create_task(prepare(events))))
+                for event in events:
+                    await queue.put(event)
+                if checkpoints:
+                    await queue.put(LongPollCheckpoint(longpoll.get_state()))
+        except Exception as e:
+            await queue.put(_Failure(e))
+
+    fetcher = asyncio.create_task(fetch())
+    try:
+        while True:
+            event = await queue.get()
+            if isinstance(event, _Prepare):
+                try:
+                    await event.task
+                except Exception as e:
+                    logging.exception("Failed to prepare long poll events: %s", e)
+                continue
+            if isinstance(event, _Failure):
+                raise event.exception
+            yield event
+    finally:
+        fetcher.cancel()
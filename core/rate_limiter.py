@@ -0,0 +1,154 @@
+import asyncio
+import time
+
+from collections import deque
+from typing import Optional
+
+
+class TokenBucket:
+    """
+    Асинхронный ограничитель запросов по алгоритму token bucket.
+
+    Корзина вмещает ``burst`` токенов и пополняется со скоростью ``rate`` токенов в секунду.
+    Каждый запрос забирает один токен. Если токенов нет, корутина встаёт в очередь,
+    и ожидающие обслуживаются строго в порядке поступления (FIFO).
+
+    :param rate: скорость пополнения, токенов в секунду
+    :param burst: ёмкость корзины (максимальная пачка запросов подряд)
+    """
+
+    __slots__ = (
+        'rate', 'burst',
+        '_tokens', '_updated', '_waiters', '_handle',
+        'acquired', 'waited', 'wait_time', 'max_wait_time',
+    )
+
+    def __init__(self, rate: float, burst: int = 1):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        if burst < 1:
+            raise ValueError("burst must be at least 1")
+
+        self.rate = rate
+        self.burst = burst
+
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._waiters: deque[asyncio.Future] = deque()
+        self._handle: Optional[asyncio.TimerHandle] = None
+
+        # Счётчики
+        self.acquired = 0
+        self.waited = 0
+        self.wait_time = 0.0
+        self.max_wait_time = 0.0
+
+    @classmethod
+    def from_delay(cls, delay: float, burst: int = 1) -> "TokenBucket":
+        """
+        Создать ограничитель по минимальному интервалу между запросами (см. :class:`VkLimits`).
+
+        :param delay: интервал между запросами в секундах
+        :param burst: ёмкость корзины
+        """
+        return cls(1 / delay, burst)
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    @property
+    def available(self) -> float:
+        """ Количество свободных токенов за вычетом ожидающих в очереди """
+        self._refill()
+        return self._tokens - len(self._waiters)
+
+    @property
+    def queue_size(self) -> int:
+        return len(self._waiters)
+
+    @property
+    def stats(self) -> dict[str, float]:
+        return {
+            'acquired': self.acquired,
+            'waited': self.waited,
+            'wait_time': self.wait_time,
+            'max_wait_time': self.max_wait_time,
+            'queue_size': len(self._waiters),
+        }
+
+    def _schedule(self) -> None:
+        if self._handle is not None or not self._waiters:
+            return
+        delay = max((1 - self._tokens) / self.rate, 0)
+        self._handle = asyncio.get_running_loop().call_later(delay, self._wake)
+
+    def _wake(self) -> None:
+        self._handle = None
+        self._refill()
+        while self._waiters and self._tokens >= 1:
+            waiter = self._waiters.popleft()
+            if waiter.done():
+                continue
+            self._tokens -= 1
+            waiter.set_result(None)
+        self._schedule()
+
+    def pause(self, delay: float) -> None:
+        """
+        Не выдавать токены ближайшие ``delay`` секунд (например, после ошибки флуд-контроля).
+
+        :param delay: время паузы в секундах
+        """
+        self._refill()
+        self._tokens = min(self._tokens, 1 - delay * self.rate)
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        self._schedule()
+
+    async def acquire(self) -> float:
+        """
+        Дождаться свободного токена.
+
+        :return: время ожидания в секундах
+        """
+        self._refill()
+        self.acquired += 1
+        if not self._waiters and self._tokens >= 1:
+            self._tokens -= 1
+            return 0.0
+
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+        self._waiters.append(waiter)
+        started = loop.time()
+        self._schedule()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Токен уже был выдан - возвращаем его следующему в очереди
+                self._tokens = min(self.burst, self._tokens + 1)
+                self._wake()
+            else:
+                try:
+                    self._waiters.remove(waiter)
+                except ValueError:
+                    pass
+            self.acquired -= 1
+            raise
+
+        waited = loop.time() - started
+        self.waited += 1
+        self.wait_time += waited
+        self.max_wait_time = max(self.max_wait_time, waited)
+        return waited
+
+    async def __aenter__(self) -> "TokenBucket":
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        pass
@@ -0,0 +1,210 @@
+import asyncio
+import random
+import time
+
+from typing import Optional, Union
+
+import aiohttp
+
+#: Базовая задержка перед повтором в зависимости от кода ошибки VK API
+RETRY_DELAY_BY_ERROR = {
+    1: 0.5,  # Неизвестная ошибка
+    6: 1.0,  # Слишком много запросов в секунду
+    9: 5.0,  # Слишком много однотипных действий
+    10: 0.5,  # Внутренняя ошибка сервера
+}
+
+#: Коды ошибок, при которых нужно замедлить все запросы ключа, а не только повторяемый
+RATE_LIMIT_ERRORS = frozenset({6, 9})
+
+#: Ошибки сети, после которых запрос можно повторить
+NETWORK_ERRORS = (aiohttp.ClientError, asyncio.TimeoutError, ConnectionError)
+
+#: Базовая задержка перед повтором после ошибки сети
+NETWORK_RETRY_DELAY = 1.0
+
+
+def get_random_id() -> int:
+    """ Случайный ``random_id`` для `messages.send`. Повтор запроса с тем же значением VK не отправит дважды """
+    return random.getrandbits(31)
+
+
+def get_error_code(result: Union[dict, BaseException]) -> Optional[int]:
+    """ Код ошибки VK API из ответа или None """
+    if isinstance(result, dict):
+        error = result.get('error')
+        if isinstance(error, dict):
+            return error.get('error_code')
+    return None
+
+
+class CircuitOpenError(Exception):
+    """
+    Вызов метода отклонён без запроса: последние вызовы метода подряд завершились ошибкой.
+
+    :ivar method: название метода
+    :ivar retry_after: через сколько секунд будет разрешён пробный вызов
+    """
+
+    def __init__(self, method: str, retry_after: float):
+        super().__init__(f"Circuit for {method} is open, retry after {retry_after:.1f}s")
+        self.method = method
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Автомат защиты для одного метода API.
+
+    После ``failure_threshold`` неудачных вызовов подряд вызовы отклоняются
+    на ``reset_timeout`` секунд, затем пропускается один пробный вызов:
+    при успехе автомат закрывается, при ошибке снова открывается.
+
+    :param failure_threshold: количество ошибок подряд для открытия
+    :param reset_timeout: время до пробного вызова в секундах
+    """
+
+    __slots__ = ('failure_threshold', 'reset_timeout', 'failures', 'opened_at', '_probing', 'opened')
+
+    def __init__(self, failure_threshold: int = 10, reset_timeout: float = 30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probing = False
+
+        # Счётчики
+        self.opened = 0
+
+    @property
+    def state(self) -> str:
+        """ 'closed', 'open' или 'half_open' """
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return 'half_open'
+        return 'open'
+
+    def check(self, method: str) -> bool:
+        """
+        Разрешить вызов или выбросить :class:`CircuitOpenError`.
+
+        :return: True, если вызов пробный. После него нужно вызвать :meth:`release`
+        """
+        if self.opened_at is None:
+            return False
+        elapsed = time.monotonic() - self.opened_at
+        if elapsed < self.reset_timeout or self._probing:
+            raise CircuitOpenError(method, max(self.reset_timeout - elapsed, 0))
+        self._probing = True
+        return True
+
+    def release(self) -> None:
+        """
+        Завершить пробный вызов, результат которого не учтён через :meth:`success`
+        или :meth:`failure` (вызов отменён или завершился ошибкой, не связанной с сервером).
+        Следующий вызов снова будет пробным
+        """
+        self._probing = False
+
+    def success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    def failure(self) -> None:
+        self.failures += 1
+        if self._probing or self.failures >= self.failure_threshold:
+            if self.opened_at is None or self._probing:
+                self.opened += 1
+            self.opened_at = time.monotonic()
+            self._probing = False
+
+
+class RetryPolicy:
+    """
+    Правила повтора запросов к API.
+
+    Повторяются ошибки сети и ошибки VK API из ``retry_errors``. Задержка растёт
+    экспоненциально от базовой для ошибки и выбирается случайно в пределах
+    [delay / 2, delay], чтобы повторы многих запросов не приходили одновременно.
+    При флуд-контроле замедляется весь ограничитель ключа, а не только повторяемый запрос.
+
+    Для каждого метода ведётся :class:`CircuitBreaker`: если метод долго не работает,
+    вызовы отклоняются сразу, не добавляя нагрузки.
+
+    :param max_attempts: максимальное количество попыток (1 - без повторов)
+    :param max_delay: максимальная задержка перед повтором в секундах
+    :param retry_errors: коды ошибок VK API и их базовые задержки
+    :param retry_network: повторять ли запросы после ошибок сети
+    :param failure_threshold: ошибок подряд для открытия автомата метода (0 - без автоматов)
+    :param reset_timeout: время до пробного вызова открытого метода в секундах
+    """
+
+    __slots__ = (
+        'max_attempts', 'max_delay', 'retry_errors', 'retry_network',
+        'failure_threshold', 'reset_timeout', 'breakers',
+        'retries', 'gave_up',
+    )
+
+    def __init__(
+            self,
+            max_attempts: int = 4,
+            max_delay: float = 30,
+            retry_errors: Optional[dict[int, float]] = None,
+            retry_network: bool = True,
+            failure_threshold: int = 10,
+            reset_timeout: float = 30,
+    ):
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1")
+        self.max_attempts = max_attempts
+        self.max_delay = max_delay
+        self.retry_errors = RETRY_DELAY_BY_ERROR if retry_errors is None else retry_errors
+        self.retry_network = retry_network
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.breakers: dict[str, CircuitBreaker] = {}
+
+        # Счётчики
+        self.retries = 0
+        self.gave_up = 0
+
+    def breaker(self, method: str) -> Optional[CircuitBreaker]:
+        """ Автомат метода (None, если автоматы отключены) """
+        if not self.failure_threshold:
+            return None
+        breaker = self.breakers.get(method)
+        if breaker is None:
+            breaker = self.breakers[method] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+        return breaker
+
+    def base_delay(self, result: Union[dict, BaseException]) -> Optional[float]:
+        """
+        Базовая задержка перед повтором или None, если результат не нужно повторять.
+
+        :param result: ответ API или исключение
+        """
+        if isinstance(result, BaseException):
+            if self.retry_network and isinstance(result, NETWORK_ERRORS):
+                return NETWORK_RETRY_DELAY
+            return None
+        return self.retry_errors.get(get_error_code(result))
+
+    def backoff(self, base_delay: float, attempt: int) -> float:
+        """
+        Задержка перед повтором.
+
+        :param base_delay: базовая задержка для ошибки
+        :param attempt: номер неудачной попытки, начиная с 1
+        """
+        delay = min(base_delay * 2 ** (attempt - 1), self.max_delay)
+        return random.uniform(delay / 2, delay)
+
+    @property
+    def stats(self) -> dict:
+        return {
+            'retries': self.retries,
+            'gave_up': self.gave_up,
+            'open_circuits': [method for method, breaker in self.breakers.items() if breaker.opened_at is not None],
+        }
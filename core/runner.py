@@ -0,0 +1,239 @@
+import asyncio
+import logging
+
+from collections import deque
+from contextlib import aclosing
+from typing import Any, Hashable, Optional
+
+from core.checkpoint import CheckpointStore
+from core.handlers.router import Router
+from core.longpoll import LongPollCheckpoint
+from core.vk_api import VkApi
+
+
+class LongPollRunner:
+    """
+    Получает события от long poll сервера и передаёт их в :class:`Router`.
+    События :class:`VkLongPoll` попадают в observers ``router.user_<тип>``.
+
+    События обрабатываются конкурентно, но не более ``workers`` одновременно.
+    События с одинаковым ``peer_id`` обрабатываются строго в порядке получения,
+    поэтому медленный обработчик в одном диалоге не задерживает остальные.
+
+    :param router: корневой маршрутизатор
+    :param vk: объект :class:`VkApi`, который будет передан событиям
+        (по умолчанию - из long poll)
+    :param workers: максимальное количество одновременно обрабатываемых событий
+    :param max_pending: максимальное количество принятых, но не обработанных событий.
+        При превышении получение новых событий приостанавливается
+    :param checkpoint_store: хранилище позиции long poll. Позиция после ответа сервера
+        сохраняется, когда обработаны все события этого и предыдущих ответов,
+        и при запуске long poll продолжает с неё
+    :param worker_semaphore: общий для нескольких обработчиков семафор вместо собственного
+        на ``workers`` событий (см. :class:`LongPollSupervisor`)
+    :param checkpoint_key: ключ позиции в хранилище (по умолчанию - ``checkpoint_key`` long poll)
+    """
+
+    def __init__(
+            self,
+            router: Router,
+            vk: Optional[VkApi] = None,
+            workers: int = 64,
+            max_pending: int = 1024,
+            checkpoint_store: Optional[CheckpointStore] = None,
+            worker_semaphore: Optional[asyncio.Semaphore] = None,
+            checkpoint_key: Optional[str] = None,
+    ) -> None:
+        self.router = router
+        self.vk = vk
+        self.workers = workers
+        self.max_pending = max_pending
+        self.checkpoint_store = checkpoint_store
+
+        self._workers = worker_semaphore or asyncio.Semaphore(workers)
+        self._pending = asyncio.Semaphore(max_pending)
+        self._queues: dict[Hashable, deque] = {}
+        self._tasks: set[asyncio.Task] = set()
+        self._running = False
+        self._poll_task: Optional[asyncio.Task] = None
+
+        # Номера принятых и ещё не обработанных событий и ожидающие сохранения позиции:
+        # [номер первого события после позиции, сколько событий до неё не обработано, состояние]
+        self._seq = 0
+        self._outstanding: set[int] = set()
+        self._checkpoints: deque[list] = deque()
+        self._checkpoint_key = checkpoint_key
+
+        # Счётчики
+        self.received = 0
+        self.processed = 0
+        self.failed = 0
+
+    @staticmethod
+    def _peer_key(event: Any) -> Optional[Hashable]:
+        return getattr(event, 'peer_id', None)
+
+    def _spawn(self, coro) -> None:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _handle(self, seq: int, event: Any) -> None:
+        try:
+            async with self._workers:
+                await self.router.propagate_event(event.type, event)
+            self.processed += 1
+        except Exception as e:
+            self.failed += 1
+            logging.exception("Exception while dispatching event: %s", e)
+        finally:
+            self._pending.release()
+            self._done(seq)
+
+    async def _drain(self, key: Hashable) -> None:
+        queue = self._queues[key]
+        try:
+            while queue:
+                await self._handle(*queue.popleft())
+        finally:
+            del self._queues[key]
+
+    def _done(self, seq: int) -> None:
+        self._outstanding.discard(seq)
+        if not self._checkpoints:
+            return
+        for checkpoint in self._checkpoints:
+            if seq < checkpoint[0]:
+                checkpoint[1] -= 1
+        self._commit_ready()
+
+    def checkpoint(self, state: dict[str, Any]) -> None:
+        """
+        Отметить позицию long poll после всех принятых событий.
+        Позиция будет сохранена, когда эти события будут обработаны.
+        """
+        if self.checkpoint_store is None:
+            return
+        self._checkpoints.append([self._seq, len(self._outstanding), state])
+        self._commit_ready()
+
+    def _commit_ready(self) -> None:
+        state = None
+        while self._checkpoints and self._checkpoints[0][1] <= 0:
+            state = self._checkpoints.popleft()[2]
+        if state is not None:
+            self._spawn(self._save_checkpoint(state))
+
+    async def _save_checkpoint(self, state: dict[str, Any]) -> None:
+        try:
+            await self.checkpoint_store.save(self._checkpoint_key, state)
+        except Exception as e:
+            logging.exception("Failed to save long poll checkpoint: %s", e)
+
+    async def submit(self, event: Any) -> None:
+        """
+        Поставить событие в обработку. Возвращается сразу, как только событие принято,
+        либо ждёт, если принято уже ``max_pending`` событий.
+        """
+        await self._pending.acquire()
+        self._accept(event)
+
+    async def try_submit(self, event: Any) -> bool:
+        """
+        Поставить событие в обработку без ожидания.
+
+        :return: False, если принято уже ``max_pending`` событий и событие не принято
+        """
+        if self._pending.locked():
+            return False
+        # Семафор свободен, поэтому захват не приостанавливает корутину
+        await self._pending.acquire()
+        self._accept(event)
+        return True
+
+    def _accept(self, event: Any) -> None:
+        self.received += 1
+
+        seq = self._seq
+        self._seq += 1
+        self._outstanding.add(seq)
+
+        vk = self.vk
+        if vk is not None and hasattr(event, 'vk'):
+            event.vk = vk
+
+        key = self._peer_key(event)
+        if key is None:
+            self._spawn(self._handle(seq, event))
+            return
+
+        queue = self._queues.get(key)
+        if queue is not None:
+            queue.append((seq, event))
+            return
+
+        self._queues[key] = deque(((seq, event),))
+        self._spawn(self._drain(key))
+
+    async def join(self) -> None:
+        """ Дождаться обработки всех принятых событий """
+        while self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def run(self, longpoll) -> None:
+        """
+        Запустить получение событий.
+
+        :param longpoll: объект :class:`VkBotLongPoll` или :class:`VkLongPoll`
+        """
+        if self.vk is None:
+            self.vk = longpoll.vk
+
+        if self.checkpoint_store is not None:
+            self._checkpoint_key = self._checkpoint_key or longpoll.checkpoint_key
+            state = await self.checkpoint_store.load(self._checkpoint_key)
+            if state is not None:
+                # Сервер будет получен в listen() с повторами после ошибок, позиция при этом сохранится
+                longpoll.set_state(state)
+                logging.info("Resuming long poll %s from %s", self._checkpoint_key, state)
+
+        self._running = True
+        self._poll_task = asyncio.create_task(self._poll(longpoll))
+        try:
+            await self._poll_task
+        except asyncio.CancelledError:
+            # Отмена из stop() - штатная остановка, отмена самого run() - нет
+            if self._running:
+                self._poll_task.cancel()
+                raise
+        finally:
+            self._running = False
+            self._poll_task = None
+            await self.join()
+
+    async def _poll(self, longpoll) -> None:
+        async with aclosing(longpoll.listen(checkpoints=self.checkpoint_store is not None)) as events:
+            async for event in events:
+                if isinstance(event, LongPollCheckpoint):
+                    self.checkpoint(event.state)
+                else:
+                    await self.submit(event)
+
+    def stop(self) -> None:
+        """
+        Остановить получение событий. Текущий запрос к серверу прерывается,
+        :meth:`run` завершается после обработки уже принятых событий
+        """
+        self._running = False
+        if self._poll_task is not None:
+            self._poll_task.cancel()
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {
+            'received': self.received,
+            'processed': self.processed,
+            'failed': self.failed,
+            'pending': self.received - self.processed - self.failed,
+            'peers': len(self._queues),
+        }
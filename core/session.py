@@ -0,0 +1,74 @@
+from typing import Optional
+
+import aiohttp
+
+
+class SessionFactory:
+    """
+    Общие HTTP-сессии для :class:`VkApi` и long poll.
+
+    Запросы к API и запросы к long poll серверу идут через разные пулы соединений,
+    поэтому висящие long poll запросы не занимают соединения, нужные для вызовов API.
+    Одну фабрику можно передать нескольким :class:`VkApi`, чтобы они использовали общий пул.
+
+    Сессии создаются при первом обращении, то есть внутри запущенного цикла событий.
+
+    :param limit: максимальное количество соединений для запросов к API
+    :param limit_per_host: максимальное количество соединений с одним хостом API
+    :param longpoll_limit: максимальное количество одновременных long poll запросов
+    :param keepalive_timeout: время жизни неиспользуемого соединения в секундах
+    :param ttl_dns_cache: время кэширования DNS в секундах
+    """
+
+    __slots__ = (
+        'limit', 'limit_per_host', 'longpoll_limit', 'keepalive_timeout', 'ttl_dns_cache',
+        '_api_session', '_longpoll_session',
+    )
+
+    def __init__(
+            self,
+            limit: int = 100,
+            limit_per_host: int = 50,
+            longpoll_limit: int = 100,
+            keepalive_timeout: float = 60,
+            ttl_dns_cache: int = 300,
+    ):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.longpoll_limit = longpoll_limit
+        self.keepalive_timeout = keepalive_timeout
+        self.ttl_dns_cache = ttl_dns_cache
+
+        self._api_session: Optional[aiohttp.ClientSession] = None
+        self._longpoll_session: Optional[aiohttp.ClientSession] = None
+
+    def _create_session(self, limit: int, limit_per_host: int) -> aiohttp.ClientSession:
+        connector = aiohttp.TCPConnector(
+            limit=limit,
+            limit_per_host=limit_per_host,
+            keepalive_timeout=self.keepalive_timeout,
+            use_dns_cache=True,
+            ttl_dns_cache=self.ttl_dns_cache,
+        )
+        return aiohttp.ClientSession(connector=connector)
+
+    @property
+    def api_session(self) -> aiohttp.ClientSession:
+        """ Сессия для вызовов методов API """
+        if self._api_session is None or self._api_session.closed:
+            self._api_session = self._create_session(self.limit, self.limit_per_host)
+        return self._api_session
+
+    @property
+    def longpoll_session(self) -> aiohttp.ClientSession:
+        """ Сессия для запросов к long poll серверам """
+        if self._longpoll_session is None or self._longpoll_session.closed:
+            self._longpoll_session = self._create_session(self.longpoll_limit, 0)
+        return self._longpoll_session
+
+    async def close(self) -> None:
+        for session in (self._api_session, self._longpoll_session):
+            if session is not None and not session.closed:
+                await session.close()
+        self._api_session = None
+        self._longpoll_session = None
@@ -0,0 +1,208 @@
+import asyncio
+import logging
+import time
+
+from typing import Any, Optional, Union
+
+from core.bot.bot_longpool import VkBotLongPoll
+from core.checkpoint import CheckpointStore
+from core.handlers.router import Router
+from core.runner import LongPollRunner
+from core.session import SessionFactory
+from core.user.user_longpool import VkLongPoll
+from core.vk_api import VkApi
+
+
+class LongPollConsumer:
+    """
+    Один long poll под управлением :class:`LongPollSupervisor`.
+
+    :ivar name: имя для логов и статистики
+    :ivar longpoll: объект :class:`VkBotLongPoll` или :class:`VkLongPoll`
+    :ivar runner: обработчик событий этого long poll
+    """
+
+    __slots__ = ('name', 'longpoll', 'runner', 'task', 'restarts', 'last_error')
+
+    def __init__(self, name: str, longpoll: Union[VkBotLongPoll, VkLongPoll], runner: LongPollRunner):
+        self.name = name
+        self.longpoll = longpoll
+        self.runner = runner
+        self.task: Optional[asyncio.Task] = None
+        self.restarts = 0
+        self.last_error: Optional[str] = None
+
+    @property
+    def running(self) -> bool:
+        return self.task is not None and not self.task.done()
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        reconnect = getattr(self.longpoll, 'reconnect', None)
+        return {
+            'running': self.running,
+            'restarts': self.restarts,
+            'last_error': self.last_error,
+            'connection': reconnect.stats if reconnect is not None else None,
+            **self.runner.stats,
+        }
+
+
+class LongPollSupervisor:
+    """
+    Запускает несколько long poll (сообществ и пользователей) в одном цикле событий.
+
+    У каждого long poll свой :class:`VkApi` со своим ограничителем запросов,
+    а маршрутизатор, HTTP-сессии и лимит одновременно обрабатываемых событий общие.
+    Упавший long poll перезапускается с увеличивающейся задержкой, остальные продолжают работу.
+    Если перед падением long poll проработал ``healthy_after`` секунд, задержка сбрасывается до начальной.
+
+    :param router: общий корневой маршрутизатор
+    :param session_factory: общие HTTP-сессии (по умолчанию создаётся новая)
+    :param workers: максимальное количество одновременно обрабатываемых событий всех long poll
+    :param max_pending: максимальное количество принятых, но не обработанных событий одного long poll
+    :param checkpoint_store: хранилище позиций long poll
+    :param restart_delay: начальная задержка перед перезапуском упавшего long poll в секундах
+    :param max_restart_delay: максимальная задержка перед перезапуском в секундах
+    :param healthy_after: через сколько секунд работы без падений сбрасывать задержку перезапуска
+    """
+
+    def __init__(
+            self,
+            router: Router,
+            session_factory: Optional[SessionFactory] = None,
+            workers: int = 256,
+            max_pending: int = 1024,
+            checkpoint_store: Optional[CheckpointStore] = None,
+            restart_delay: float = 1,
+            max_restart_delay: float = 60,
+            healthy_after: float = 300,
+    ) -> None:
+        self.router = router
+        self.owns_session_factory = session_factory is None
+        self.session_factory = session_factory or SessionFactory()
+        self.max_pending = max_pending
+        self.checkpoint_store = checkpoint_store
+        self.restart_delay = restart_delay
+        self.max_restart_delay = max_restart_delay
+        self.healthy_after = healthy_after
+
+        self._workers = asyncio.Semaphore(workers)
+        self._running = False
+        self.consumers: dict[str, LongPollConsumer] = {}
+
+    def add(self, longpoll: Union[VkBotLongPoll, VkLongPoll], name: Optional[str] = None) -> LongPollConsumer:
+        """
+        Добавить long poll. Если супервизор уже запущен, long poll запускается сразу.
+
+        :param longpoll: объект :class:`VkBotLongPoll` или :class:`VkLongPoll`
+        :param name: имя, оно же ключ позиции в хранилище (по умолчанию - :attr:`checkpoint_key` long poll)
+        """
+        name = name or longpoll.checkpoint_key
+        if name in self.consumers:
+            raise ValueError(f"Long poll {name!r} already added")
+
+        runner = LongPollRunner(
+            self.router,
+            longpoll.vk,
+            max_pending=self.max_pending,
+            checkpoint_store=self.checkpoint_store,
+            worker_semaphore=self._workers,
+            checkpoint_key=name,
+        )
+        consumer = LongPollConsumer(name, longpoll, runner)
+        self.consumers[name] = consumer
+
+        if self._running:
+            consumer.task = asyncio.create_task(self._supervise(consumer))
+        return consumer
+
+    def add_group(self, token: str, group_id: int, name: Optional[str] = None, wait: int = 25,
+                  **vk_kwargs) -> LongPollConsumer:
+        """
+        Добавить Bots Long Poll сообщества с общими HTTP-сессиями.
+
+        :param token: ключ доступа сообщества
+        :param group_id: id сообщества
+        :param name: имя (по умолчанию - ``bot:<group_id>``)
+        :param wait: время ожидания long poll
+        :param vk_kwargs: дополнительные параметры :class:`VkApi`
+        """
+        vk = VkApi(token, is_group_token=True, session_factory=self.session_factory, **vk_kwargs)
+        return self.add(VkBotLongPoll(vk, group_id, wait=wait), name)
+
+    def add_user(self, token: str, name: str, longpoll_kwargs: Optional[dict] = None,
+                 **vk_kwargs) -> LongPollConsumer:
+        """
+        Добавить User Long Poll с общими HTTP-сессиями.
+        События передаются в observers ``router.user_<тип>`` (например, ``router.user_message_new``).
+
+        :param token: ключ доступа пользователя
+        :param name: имя. Обязательно, так как у разных пользователей одинаковый
+            :attr:`VkLongPoll.checkpoint_key`, а имя используется как ключ позиции
+        :param longpoll_kwargs: параметры :class:`VkLongPoll`
+        :param vk_kwargs: дополнительные параметры :class:`VkApi`
+        """
+        vk = VkApi(token, session_factory=self.session_factory, **vk_kwargs)
+        return self.add(VkLongPoll(vk, **(longpoll_kwargs or {})), name)
+
+    async def remove(self, name: str) -> None:
+        """ Остановить и удалить long poll """
+        consumer = self.consumers.pop(name)
+        await self._cancel(consumer)
+
+    async def _supervise(self, consumer: LongPollConsumer) -> None:
+        delay = self.restart_delay
+        while True:
+            started = time.monotonic()
+            try:
+                await consumer.runner.run(consumer.longpoll)
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if time.monotonic() - started >= self.healthy_after:
+                    delay = self.restart_delay
+                consumer.restarts += 1
+                consumer.last_error = repr(e)
+                logging.exception("Long poll %s failed, restarting in %.1fs: %s", consumer.name, delay, e)
+
+            # Сервер будет получен заново
+            consumer.longpoll.url = None
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_restart_delay)
+
+    @staticmethod
+    async def _cancel(consumer: LongPollConsumer) -> None:
+        if consumer.task is None:
+            return
+        consumer.task.cancel()
+        await asyncio.gather(consumer.task, return_exceptions=True)
+        consumer.task = None
+
+    async def run(self) -> None:
+        """ Запустить все добавленные long poll и ждать, пока они не будут остановлены """
+        self._running = True
+        for consumer in self.consumers.values():
+            if consumer.task is None:
+                consumer.task = asyncio.create_task(self._supervise(consumer))
+        try:
+            while True:
+                tasks = [consumer.task for consumer in self.consumers.values() if consumer.running]
+                if not tasks:
+                    return
+                await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            self._running = False
+            await self.stop()
+
+    async def stop(self) -> None:
+        """ Остановить все long poll и закрыть общие HTTP-сессии """
+        await asyncio.gather(*(self._cancel(consumer) for consumer in self.consumers.values()))
+        if self.owns_session_factory:
+            await self.session_factory.close()
+
+    @property
+    def stats(self) -> dict[str, dict[str, Any]]:
+        """ Статистика по каждому long poll """
+        return {name: consumer.stats for name, consumer in self.consumers.items()}
@@ -0,0 +1,117 @@
+import asyncio
+import logging
+import time
+
+from typing import Optional
+
+from core.rate_limiter import TokenBucket
+
+#: На сколько секунд исключать ключ из работы в зависимости от кода ошибки
+QUARANTINE_BY_ERROR = {
+    5: 3600.0,  # Авторизация не удалась
+    6: 1.0,  # Слишком много запросов в секунду
+    9: 60.0,  # Слишком много однотипных действий
+    29: 3600.0,  # Достигнут количественный лимит на вызов метода
+}
+
+
+class TokenState:
+    """
+    Ключ доступа из пула вместе с его ограничителем запросов и состоянием.
+
+    :param token: ключ доступа
+    :param limiter: ограничитель запросов этого ключа
+    """
+
+    __slots__ = ('token', 'limiter', 'quarantined_until', 'last_error', 'requests', 'errors')
+
+    def __init__(self, token: str, limiter: TokenBucket):
+        self.token = token
+        self.limiter = limiter
+        self.quarantined_until = 0.0
+        self.last_error: Optional[dict] = None
+
+        # Счётчики
+        self.requests = 0
+        self.errors = 0
+
+    @property
+    def healthy(self) -> bool:
+        return self.quarantined_until <= time.monotonic()
+
+    def __repr__(self):
+        return f'<TokenState(...{self.token[-4:]}, available={self.limiter.available:.2f}, healthy={self.healthy})>'
+
+
+class TokenPool:
+    """
+    Пул ключей доступа. Каждый вызов направляется ключу с наибольшим запасом
+    свободных запросов, ключи с ошибками авторизации или флуд-контроля временно исключаются.
+
+    :param tokens: ключи доступа
+    :param delay: минимальный интервал между запросами одного ключа (см. :class:`VkLimits`)
+    :param burst: ёмкость корзины ограничителя каждого ключа
+    """
+
+    __slots__ = ('states',)
+
+    def __init__(self, tokens: list[str], delay: float, burst: int = 1):
+        if not tokens:
+            raise ValueError("At least one token must be provided")
+        self.states = [TokenState(token, TokenBucket.from_delay(delay, burst)) for token in tokens]
+
+    def select(self) -> TokenState:
+        """ Выбрать ключ с наибольшим запасом. Если все ключи в карантине, вернуть освобождающийся первым """
+        healthy = [state for state in self.states if state.healthy]
+        if not healthy:
+            return min(self.states, key=lambda state: state.quarantined_until)
+        return max(healthy, key=lambda state: state.limiter.available)
+
+    async def acquire(self) -> TokenState:
+        """ Выбрать ключ и дождаться свободного запроса в его ограничителе """
+        state = self.select()
+        delay = state.quarantined_until - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        await state.limiter.acquire()
+        state.requests += 1
+        return state
+
+    @property
+    def healthy(self) -> bool:
+        """ Есть ли ключи не в карантине """
+        return any(state.healthy for state in self.states)
+
+    def report(self, state: TokenState, response: dict) -> bool:
+        """
+        Учесть ответ API: при ошибке авторизации или флуд-контроля поместить ключ в карантин.
+
+        :return: True, если ключ помещён в карантин
+        """
+        error = response.get('error') if isinstance(response, dict) else None
+        if not error:
+            return False
+
+        state.errors += 1
+        state.last_error = error
+        quarantine = QUARANTINE_BY_ERROR.get(error.get('error_code'))
+        if quarantine:
+            state.quarantined_until = time.monotonic() + quarantine
+            logging.warning(
+                "Token ...%s quarantined for %ss: %s", state.token[-4:], quarantine, error.get('error_msg')
+            )
+            return True
+        return False
+
+    @property
+    def stats(self) -> list[dict]:
+        return [
+            {
+                'token': '...' + state.token[-4:],
+                'healthy': state.healthy,
+                'requests': state.requests,
+                'errors': state.errors,
+                **state.limiter.stats,
+            }
+            for state in self.states
+        ]
@@ -313,11 +313,65 @@ class Event(object):
         - `message` - оригинальный текст сообщения.
 
     События с полем `timestamp` также дополнительно имеют поле `datetime`.
+
+    При создании определяется только тип события. Поля из `raw` разбираются
+    при первом обращении к любому из них, а `message`, `message_flags`, `peer_flags`,
+    `datetime`, `platform`, `offline_type` и `update_type` вычисляются при первом обращении к ним.
+
+    Все поля объявлены в `__slots__`. Редкие дополнительные поля сообщения и настроек,
+    для которых нет слота, доступны как атрибуты и хранятся в `extra_fields`.
     """
 
+    __slots__ = (
+        'raw', 'type', 'message_data', '_parsed', 'extra_fields',
+        # Поля из raw
+        'message_id', 'flags', 'peer_id', 'timestamp', 'text', 'extra_values', 'attachments', 'random_id',
+        'mask', 'user_id', 'extra', 'chat_id', 'self', 'type_id', 'info', 'local_id', 'count', 'values', 'call_id',
+        # Вычисляемые при разборе
+        'from_user', 'from_chat', 'from_group', 'from_me', 'to_me', 'group_id',
+        # Частые дополнительные поля сообщения и настроек уведомлений
+        'title', 'emoji', 'payload', 'keyboard', 'has_template', 'expire_ttl', 'marked_users',
+        'sound', 'disabled_until',
+        # Вычисляемые при первом обращении
+        'message_flags', 'peer_flags', 'message', 'datetime', 'platform', 'offline_type', 'update_type',
+    )
+
     def __init__(self, raw):
         self.raw = raw
+        self.message_data = None
+        self._parsed = False
+        self.extra_fields = None
+
+        try:
+            self.type = VkEventType(raw[0])
+        except ValueError:
+            self.type = raw[0]
+
+    def __getattr__(self, name):
+        # Вызывается только для отсутствующих атрибутов
+        if name.startswith('__'):
+            raise AttributeError(name)
 
+        if not self._parsed:
+            self._parsed = True
+            self._parse()
+            try:
+                return object.__getattribute__(self, name)
+            except AttributeError:
+                pass
+
+        compute = LAZY_EVENT_FIELDS.get(name)
+        if compute is not None:
+            value = compute(self)
+            setattr(self, name, value)
+            return value
+
+        if self.extra_fields is not None and name in self.extra_fields:
+            return self.extra_fields[name]
+
+        raise AttributeError(f"{type(self).__name__!r} object has no attribute {name!r}")
+
+    def _parse(self):
         self.from_user = False
         self.from_chat = False
         self.from_group = False
@@ -325,7 +379,6 @@ class Event(object):
         self.to_me = False
 
         self.attachments = {}
-        self.message_data = None
 
         self.message_id = None
         self.timestamp = None
@@ -335,11 +388,8 @@ class Event(object):
         self.extra_values = None
         self.type_id = None
 
-        try:
-            self.type = VkEventType(self.raw[0])
+        if isinstance(self.type, VkEventType):
             self._list_to_attr(self.raw[1:], EVENT_ATTRS_MAPPING[self.type])
-        except ValueError:
-            self.type = self.raw[0]
 
         if self.extra_values:
             self._dict_to_attr(self.extra_values)
@@ -347,44 +397,43 @@ class Event(object):
         if self.type in PARSE_PEER_ID_EVENTS:
             self._parse_peer_id()
 
-        if self.type in PARSE_MESSAGE_FLAGS_EVENTS:
-            self._parse_message_flags()
-
         if self.type is VkEventType.CHAT_UPDATE:
             self._parse_chat_info()
-            try:
-                self.update_type = VkChatEventType(self.type_id)
-            except ValueError:
-                self.update_type = self.type_id
 
         elif self.type is VkEventType.NOTIFICATION_SETTINGS_UPDATE:
             self._dict_to_attr(self.values)
             self._parse_peer_id()
 
-        elif self.type is VkEventType.PEER_FLAGS_REPLACE:
-            self._parse_peer_flags()
+        elif self.type in (VkEventType.MESSAGE_NEW, VkEventType.MESSAGE_EDIT):
+            if self.type is VkEventType.MESSAGE_NEW:
+                if self.flags & VkMessageFlag.OUTBOX:
+                    self.from_me = True
+                else:
+                    self.to_me = True
 
-        elif self.type in [VkEventType.MESSAGE_NEW, VkEventType.MESSAGE_EDIT]:
-            self._parse_message()
+            # ВК возвращает сообщения в html-escaped виде,
+            # при этом переводы строк закодированы как <br> и не экранированы
+            self.text = self.text.replace('<br>', '\n')
 
-        elif self.type in [VkEventType.USER_ONLINE, VkEventType.USER_OFFLINE]:
+        elif self.type in (VkEventType.USER_ONLINE, VkEventType.USER_OFFLINE):
             self.user_id = abs(self.user_id)
-            self._parse_online_status()
 
         elif self.type is VkEventType.USER_RECORDING_VOICE:
             if isinstance(self.user_id, list):
                 self.user_id = self.user_id[0]
 
-        if self.timestamp:
-            self.datetime = datetime.fromtimestamp(self.timestamp)
-
     def _list_to_attr(self, raw, attrs):
         for i in range(min(len(raw), len(attrs))):
-            self.__setattr__(attrs[i], raw[i])
+            setattr(self, attrs[i], raw[i])
 
     def _dict_to_attr(self, values):
         for k, v in values.items():
-            self.__setattr__(k, v)
+            if k in _EVENT_SLOTS:
+                setattr(self, k, v)
+            else:
+                if self.extra_fields is None:
+                    self.extra_fields = {}
+                self.extra_fields[k] = v
 
     def _parse_peer_id(self):
         if self.peer_id < 0:  # Сообщение от/для группы
@@ -402,40 +451,6 @@ class Event(object):
             self.from_user = True
             self.user_id = self.peer_id
 
-    def _parse_message_flags(self):
-        self.message_flags = {x for x in VkMessageFlag if self.flags & x}
-
-    def _parse_peer_flags(self):
-        self.peer_flags = {x for x in VkPeerFlag if self.flags & x}
-
-    def _parse_message(self):
-        if self.type is VkEventType.MESSAGE_NEW:
-            if self.flags & VkMessageFlag.OUTBOX:
-                self.from_me = True
-            else:
-                self.to_me = True
-
-        # ВК возвращает сообщения в html-escaped виде,
-        # при этом переводы строк закодированы как <br> и не экранированы
-
-        self.text = self.text.replace('<br>', '\n')
-        self.message = self.text \
-            .replace('&lt;', '<') \
-            .replace('&gt;', '>') \
-            .replace('&quot;', '"') \
-            .replace('&amp;', '&')
-
-    def _parse_online_status(self):
-        try:
-            if self.type is VkEventType.USER_ONLINE:
-                self.platform = VkPlatform(self.extra & 0xFF)
-
-            elif self.type is VkEventType.USER_OFFLINE:
-                self.offline_type = VkOfflineType(self.flags)
-
-        except ValueError:
-            pass
-
     def _parse_chat_info(self):
         if self.type_id == VkChatEventType.ADMIN_ADDED.value:
             self.info = {'admin_id': self.info}
@@ -465,3 +480,77 @@ class Event(object):
 
     def __repr__(self):
         return self.__str__()
+
+
+_EVENT_SLOTS = frozenset(Event.__slots__)
+
+
+def _no_field(event, name):
+    return AttributeError(f"{type(event).__name__!r} object has no attribute {name!r}")
+
+
+def _message_flags(event):
+    if event.type not in PARSE_MESSAGE_FLAGS_EVENTS:
+        raise _no_field(event, 'message_flags')
+    return {x for x in VkMessageFlag if event.flags & x}
+
+
+def _peer_flags(event):
+    if event.type is not VkEventType.PEER_FLAGS_REPLACE:
+        raise _no_field(event, 'peer_flags')
+    return {x for x in VkPeerFlag if event.flags & x}
+
+
+def _message(event):
+    if event.type not in (VkEventType.MESSAGE_NEW, VkEventType.MESSAGE_EDIT):
+        raise _no_field(event, 'message')
+    return event.text \
+        .replace('&lt;', '<') \
+        .replace('&gt;', '>') \
+        .replace('&quot;', '"') \
+        .replace('&amp;', '&')
+
+
+def _datetime(event):
+    if not event.timestamp:
+        raise _no_field(event, 'datetime')
+    return datetime.fromtimestamp(event.timestamp)
+
+
+def _platform(event):
+    if event.type is VkEventType.USER_ONLINE:
+        try:
+            return VkPlatform(event.extra & 0xFF)
+        except ValueError:
+            pass
+    raise _no_field(event, 'platform')
+
+
+def _offline_type(event):
+    if event.type is VkEventType.USER_OFFLINE:
+        try:
+            return VkOfflineType(event.flags)
+        except ValueError:
+            pass
+    raise _no_field(event, 'offline_type')
+
+
+def _update_type(event):
+    if event.type is not VkEventType.CHAT_UPDATE:
+        raise _no_field(event, 'update_type')
+    try:
+        return VkChatEventType(event.type_id)
+    except ValueError:
+        return event.type_id
+
+
+#: Поля :class:`Event`, которые вычисляются при первом обращении
+LAZY_EVENT_FIELDS = {
+    'message_flags': _message_flags,
+    'peer_flags': _peer_flags,
+    'message': _message,
+    'datetime': _datetime,
+    'platform': _platform,
+    'offline_type': _offline_type,
+    'update_type': _update_type,
+}
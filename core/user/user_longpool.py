@@ -1,12 +1,12 @@
+import asyncio
 import logging
 
-from collections import defaultdict
-
-import aiohttp
+from collections import OrderedDict, defaultdict
 
 from aiohttp.web_exceptions import HTTPError
 
-from core.user.user_events import DEFAULT_MODE, Event, VkEventType, VkLongpollMode
+from core.longpoll import ReconnectPolicy, listen_events
+from core.user.user_events import CHAT_START_ID, DEFAULT_MODE, Event, VkEventType, VkLongpollMode, VkMessageFlag
 from core.vk_api import VkApi
 
 
@@ -22,12 +22,20 @@ class VkLongPoll(object):
         получения ссылок на прикрепленные файлы
     :param group_id: идентификатор сообщества
         (для сообщений сообщества с ключом доступа пользователя)
+    :param recover_history: при потере событий (`failed` 1 и 3) догружать пропущенные
+        события через `messages.getLongPollHistory` по сохранённому `pts`
+    :param max_history_pages: максимальное количество запросов истории за одно восстановление
+    :param preload_cache_size: сколько последних загруженных сообщений хранить,
+        чтобы не загружать их повторно
+    :param reconnect: правила переподключения (:class:`ReconnectPolicy`)
     """
 
     __slots__ = (
         'vk', 'wait', 'mode', 'preload_messages', 'group_id',
-        'url', 'session',
-        'key', 'server', 'ts', 'pts', 'lgr'
+        'recover_history', 'max_history_pages',
+        'preload_cache', 'preload_cache_size',
+        'url',
+        'key', 'server', 'ts', 'pts', 'lgr', 'reconnect'
     )
 
     #: Класс для событий
@@ -39,13 +47,26 @@ class VkLongPoll(object):
         VkEventType.MESSAGE_EDIT
     ]
 
+    #: Максимальное количество сообщений в одном запросе `messages.getById`
+    PRELOAD_CHUNK_SIZE = 100
+
+    #: Количество событий и сообщений, запрашиваемых за один вызов `messages.getLongPollHistory`
+    HISTORY_EVENTS_LIMIT = 1000
+    HISTORY_MESSAGES_LIMIT = 200
+
     def __init__(self, vk: VkApi, wait=25, mode=DEFAULT_MODE,
-                 preload_messages=False, group_id=None):
+                 preload_messages=False, group_id=None,
+                 recover_history=True, max_history_pages=10, preload_cache_size=1000, reconnect=None):
         self.vk = vk
         self.wait = wait
         self.mode = mode.value if isinstance(mode, VkLongpollMode) else mode
         self.preload_messages = preload_messages
         self.group_id = group_id
+        self.recover_history = recover_history
+        self.max_history_pages = max_history_pages
+        self.preload_cache = OrderedDict()
+        self.preload_cache_size = preload_cache_size
+        self.reconnect = reconnect or ReconnectPolicy()
         self.lgr = logging.getLogger(self.__class__.__name__)
 
         self.url = None
@@ -54,7 +75,19 @@ class VkLongPoll(object):
         self.ts = None
         self.pts = None
 
-        self.session = aiohttp.ClientSession()
+    @property
+    def checkpoint_key(self):
+        """ Идентификатор для хранения позиции в :class:`CheckpointStore` """
+        return f'user:{self.group_id or 0}'
+
+    def get_state(self):
+        """ Текущая позиция на сервере """
+        return {'ts': self.ts, 'pts': self.pts}
+
+    def set_state(self, state):
+        """ Продолжить с сохранённой позиции """
+        self.ts = state['ts']
+        self.pts = state.get('pts')
 
     def _parse_event(self, raw_event):
         return self.DEFAULT_EVENT_CLASS(raw_event)
@@ -82,11 +115,13 @@ class VkLongPoll(object):
             self.ts = response['ts']
             self.pts = response.get('pts')
 
+        self.reconnect.key_updated()
         logging.debug(f"Longpoll server updated. Server '{self.url}' key: {self.key}")
 
-    async def get_events(self):
+    async def get_events(self, preload=None):
         """ Получить события от сервера один раз
 
+        :param preload: загрузить данные сообщений (по умолчанию - `preload_messages`)
         :returns: `list` of :class:`Event`
         """
         if not self.url:
@@ -104,50 +139,239 @@ class VkLongPoll(object):
 
         if 'failed' not in response:
             self.ts = response['ts']
-            self.pts = response.get('pts')
+            self.pts = response.get('pts', self.pts)
 
             events = [
                 self._parse_event(raw_event)
                 for raw_event in response['updates']
             ]
 
-            if self.preload_messages:
+            if self.preload_messages if preload is None else preload:
                 await self.preload_message_events_data(events)
 
             return events
 
         elif response['failed'] == 1:
+            # История событий устарела или частично утеряна
+            lost_state = self.get_state()
             self.ts = response['ts']
+            return await self._recover(lost_state)
 
         elif response['failed'] == 2:
+            # Истёк только ключ, ts остаётся прежним - события не теряются
             await self.update_longpoll_server(update_ts=False)
 
         elif response['failed'] == 3:
+            # Информация утеряна: сначала догружаем историю, затем получаем новые ключ и ts
+            lost_state = self.get_state()
+            events = await self._recover(lost_state)
             await self.update_longpoll_server()
+            return events
 
         return []
 
+    async def _recover(self, state):
+        if not self.recover_history:
+            return []
+        if state.get('pts') is None:
+            self.lgr.warning("Long poll events lost, but pts is unknown: history recovery skipped")
+            return []
+        try:
+            events, pts = await self._get_history(state['ts'], state['pts'])
+        except Exception as e:
+            self.lgr.exception("Long poll history recovery failed: %s", e)
+            return []
+        # Иначе сохранённая позиция указывала бы на уже полученную историю
+        self.pts = pts
+        return events
+
+    async def get_history(self, ts, pts):
+        """ Получить события, пропущенные начиная с позиции `ts`/`pts`,
+        через `messages.getLongPollHistory`
+
+        События сообщений получают текст из загруженных сообщений и поле `message_data`.
+        Сообщения, которых нет в ответе (их больше `HISTORY_MESSAGES_LIMIT`),
+        загружаются через `messages.getById`.
+
+        :returns: `list` of :class:`Event`
+        """
+        events, _ = await self._get_history(ts, pts)
+        return events
+
+    async def _get_history(self, ts, pts):
+        events = []
+        for _ in range(self.max_history_pages):
+            values = {
+                'ts': ts,
+                'pts': pts,
+                'lp_version': 3,
+                'preview_length': 0,
+                'events_limit': self.HISTORY_EVENTS_LIMIT,
+                'msgs_limit': self.HISTORY_MESSAGES_LIMIT,
+            }
+            if self.group_id:
+                values['group_id'] = self.group_id
+
+            response = await self.vk.method('messages.getLongPollHistory', values)
+            if not (history := response.get('response')):
+                self.lgr.error("Get longpoll history failed: %s", response)
+                break
+
+            messages = {
+                message['id']: message
+                for message in history.get('messages', {}).get('items', [])
+            }
+            missing = [
+                raw_event[1]
+                for raw_event in history.get('history', [])
+                if raw_event and raw_event[0] in self.PRELOAD_MESSAGE_EVENTS and raw_event[1] not in messages
+            ]
+            if missing:
+                messages.update(await self._load_messages(dict.fromkeys(missing)))
+
+            events.extend(self._parse_history(history, messages))
+            pts = history.get('new_pts', pts)
+            if not history.get('more'):
+                break
+        else:
+            self.lgr.warning("Long poll history recovery stopped after %s pages", self.max_history_pages)
+
+        self.lgr.info("Recovered %s long poll events from history", len(events))
+        return events, pts
+
+    def _parse_history(self, history, messages):
+        events = []
+        for raw_event in history.get('history', []):
+            message = None
+            if raw_event and raw_event[0] in self.PRELOAD_MESSAGE_EVENTS:
+                message = messages.get(raw_event[1])
+                if message is None:
+                    # Сообщение удалено и недоступно
+                    self.lgr.debug("Message %s from history not found", raw_event[1])
+                    continue
+                raw_event = self._message_to_raw_event(raw_event[0], message)
+
+            event = self._parse_event(raw_event)
+            if message is not None:
+                event.message_data = message
+            events.append(event)
+
+        return events
+
+    @staticmethod
+    def _message_to_raw_event(event_type, message):
+        """ Собрать событие в формате long poll из объекта сообщения """
+        # Текст в long poll приходит экранированным, переводы строк - как <br>
+        text = message.get('text', '') \
+            .replace('&', '&amp;') \
+            .replace('"', '&quot;') \
+            .replace('<', '&lt;') \
+            .replace('>', '&gt;') \
+            .replace('\n', '<br>')
+
+        extra_values = {'title': ''}
+        if message['peer_id'] > CHAT_START_ID:
+            extra_values['from'] = str(message.get('from_id'))
+
+        flags = VkMessageFlag.OUTBOX.value if message.get('out') else 0
+
+        return [
+            event_type, message['id'], flags, message['peer_id'], message.get('date'),
+            text, extra_values, {}, message.get('random_id', 0),
+        ]
+
+    def listen(self, queue_size=1000, checkpoints=False):
+        """ Слушать сервер: запросы отправляются непрерывно, события выдаются по мере получения
+
+        `async for event in longpoll.listen(): ...`
+
+        :param queue_size: размер буфера полученных событий
+        :param checkpoints: после событий каждого ответа выдавать :class:`LongPollCheckpoint`
+        """
+        if not self.preload_messages:
+            return listen_events(self, queue_size, checkpoints)
+
+        # Предзагрузка выполняется в фоне и не задерживает следующий запрос к серверу
+        return listen_events(
+            self, queue_size, checkpoints,
+            fetch_events=lambda: self.get_events(preload=False),
+            prepare=self.preload_message_events_data,
+        )
+
     async def preload_message_events_data(self, events):
         """ Предзагрузка данных сообщений из API
 
+        Сообщения запрашиваются частями по `PRELOAD_CHUNK_SIZE` параллельно.
+        Недавно загруженные сообщения берутся из кэша. `MESSAGE_EDIT` сбрасывает запись кэша
+        и загружает сообщение заново, если в кэше нет версии не старше этого редактирования.
+
         :type events: list of Event
         """
-        message_ids = set()
         event_by_message_id = defaultdict(list)
 
         for event in events:
-            if event.type in self.PRELOAD_MESSAGE_EVENTS:
-                message_ids.add(event.message_id)
-                event_by_message_id[event.message_id].append(event)
-
-        if not message_ids:
+            if event.type in self.PRELOAD_MESSAGE_EVENTS and event.message_data is None:
+                cached = self._get_cached_message(event)
+                if cached is not None:
+                    event.message_data = cached
+                else:
+                    event_by_message_id[event.message_id].append(event)
+
+        if not event_by_message_id:
             return
 
-        messages_data = await self.vk.method(
-            'messages.getById',
-            {'message_ids': message_ids}
-        )
-
-        for message in messages_data['items']:
-            for event in event_by_message_id[message['id']]:
+        for message_id, message in (await self._load_messages(event_by_message_id)).items():
+            for event in event_by_message_id[message_id]:
                 event.message_data = message
+
+    async def _load_messages(self, message_ids):
+        """ Загрузить сообщения частями по `PRELOAD_CHUNK_SIZE` параллельно и сохранить в кэш
+
+        :returns: `dict` id -> сообщение (без ненайденных)
+        """
+        message_ids = list(message_ids)
+        chunks = [
+            message_ids[i:i + self.PRELOAD_CHUNK_SIZE]
+            for i in range(0, len(message_ids), self.PRELOAD_CHUNK_SIZE)
+        ]
+        responses = await asyncio.gather(*(self._get_messages_by_id(chunk) for chunk in chunks))
+
+        messages = {}
+        for response in responses:
+            for message in response.get('response', {}).get('items', []):
+                self._cache_message(message)
+                messages[message['id']] = message
+        return messages
+
+    async def _get_messages_by_id(self, message_ids):
+        values = {'message_ids': ','.join(map(str, message_ids))}
+        if self.group_id:
+            values['group_id'] = self.group_id
+        return await self.vk.method('messages.getById', values)
+
+    def _get_cached_message(self, event):
+        message = self.preload_cache.get(event.message_id)
+        if message is None:
+            return None
+        if event.type is VkEventType.MESSAGE_EDIT and not self._is_edit_cached(event, message):
+            # Измениться могли и текст, и вложения, и клавиатура - сохранённая версия устарела
+            del self.preload_cache[event.message_id]
+            return None
+        self.preload_cache.move_to_end(event.message_id)
+        return message
+
+    @staticmethod
+    def _is_edit_cached(event, message):
+        # Сохранённая версия актуальна, только если она загружена после этого редактирования.
+        # Время события сравнивается с update_time, только если оно позже создания сообщения
+        update_time = message.get('update_time')
+        timestamp = event.timestamp
+        return bool(update_time and timestamp and message.get('date', 0) < timestamp <= update_time)
+
+    def _cache_message(self, message):
+        if not self.preload_cache_size:
+            return
+        self.preload_cache[message['id']] = message
+        self.preload_cache.move_to_end(message['id'])
+        if len(self.preload_cache) > self.preload_cache_size:
+            self.preload_cache.popitem(last=False)
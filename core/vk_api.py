@@ -1,43 +1,208 @@
 import asyncio
-import time
+import logging
+
+from typing import Optional, Union
 
 import aiohttp
 
+from core.cache import ResponseCache
+from core.codec import JsonCodec, get_codec
+from core.execute import ExecuteBatcher, normalize_params
 from core.limits import VkLimits
+from core.loader import GroupLoader, UserLoader
+from core.rate_limiter import TokenBucket
+from core.retry import RATE_LIMIT_ERRORS, RetryPolicy, get_error_code, get_random_id
+from core.session import SessionFactory
+from core.token_pool import TokenPool
 
 
 class VkApi:
     """
     Отправляет запросы по VK API и контролирует кол-во запросов в секунду.
+
+    :param token: ключ доступа или список ключей. Если передан список, запросы распределяются
+        между ключами через :class:`TokenPool`, у каждого ключа свой лимит запросов. Если ключ
+        исключён из работы из-за ошибки, вызов один раз повторяется другим ключом
+    :param proxy: адрес прокси
+    :param v: версия API
+    :param is_group_token: ключ доступа сообщества (влияет на лимит запросов)
+    :param burst: сколько запросов можно отправить подряд без ожидания
+    :param limiter: собственный ограничитель запросов. Нельзя передать вместе со списком ключей:
+        у каждого ключа пула свой ограничитель
+    :param session_factory: общие HTTP-сессии (:class:`SessionFactory`). Если не передана,
+        создаётся собственная и закрывается в :meth:`close`
+    :param codec: кодек JSON для ответов (по умолчанию - :func:`get_codec`)
+    :param batch_window: если задано, вызовы методов, сделанные в течение этого окна (в секундах),
+        объединяются в один запрос execute
+    :param retry: правила повтора запросов (по умолчанию - :class:`RetryPolicy` с настройками
+        по умолчанию). Чтобы отключить повторы, передайте ``RetryPolicy(max_attempts=1)``
+    :param cache: кэш ответов методов, которые только читают данные (:class:`ResponseCache`)
+
+    :ivar users: пакетная загрузка пользователей (:class:`UserLoader`)
+    :ivar groups: пакетная загрузка сообществ (:class:`GroupLoader`)
     """
 
-    def __init__(self, token: str, proxy: str = None, v: str = '5.199', is_group_token: bool = False):
-        self.token = token
+    #: Методы, которые никогда не объединяются в execute
+    UNBATCHED_METHODS = frozenset({'execute'})
+
+    #: Методы, которым автоматически подставляется ``random_id``, чтобы повтор не создал дубликат
+    RANDOM_ID_METHODS = frozenset({'messages.send'})
+
+    def __init__(
+            self,
+            token: Union[str, list[str]],
+            proxy: str = None,
+            v: str = '5.199',
+            is_group_token: bool = False,
+            burst: int = 1,
+            limiter: Optional[TokenBucket] = None,
+            batch_window: Optional[float] = None,
+            session_factory: Optional[SessionFactory] = None,
+            codec: Optional[JsonCodec] = None,
+            retry: Optional[RetryPolicy] = None,
+            cache: Optional[ResponseCache] = None,
+    ):
         self.proxy = proxy
         self.v = v
 
         self.RPS_DELAY = VkLimits.GROUP_MESSAGE_LIMIT if is_group_token else VkLimits.USER_MESSAGE_LIMIT
-        self.last_request_dt = time.time()
 
-        self.session = aiohttp.ClientSession()
+        self.pool: Optional[TokenPool] = None
+        if isinstance(token, str):
+            self.token = token
+            self.limiter = limiter or TokenBucket.from_delay(self.RPS_DELAY, burst)
+        else:
+            if limiter is not None:
+                raise ValueError("limiter cannot be used with a list of tokens, each token has its own limiter")
+            self.pool = TokenPool(list(token), self.RPS_DELAY, burst)
+            self.token = self.pool.states[0].token
+            self.limiter = None
+
+        self.batcher = ExecuteBatcher(self, batch_window) if batch_window is not None else None
+
+        self.codec = codec or get_codec()
+        self.retry = retry or RetryPolicy()
+        self.cache = cache
+
+        self.users = UserLoader(self)
+        self.groups = GroupLoader(self)
+
+        self.owns_session_factory = session_factory is None
+        self.session_factory = session_factory or SessionFactory()
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        return self.session_factory.api_session
+
+    async def method(self, method: str, params: dict, batch: bool = True):
+        """
+        Вызвать метод API.
 
-    async def _delay(self):
-        delay_time = max(self.RPS_DELAY - (time.time() - self.last_request_dt), 0)
-        if delay_time:
-            await asyncio.sleep(delay_time)
+        :param method: название метода
+        :param params: параметры
+        :param batch: разрешить объединение вызова в execute (если батчинг включен)
+        """
+        if method in self.RANDOM_ID_METHODS and not params.get('random_id'):
+            params['random_id'] = get_random_id()
+        if self.cache is not None and self.cache.cacheable(method):
+            return await self.cache.fetch(method, params, lambda: self._call(method, params, batch))
+        return await self._call(method, params, batch)
 
-    async def method(self, method: str, params: dict):
-        await self._delay()
+    async def _call(self, method: str, params: dict, batch: bool):
+        if batch and self.batcher is not None and method not in self.UNBATCHED_METHODS:
+            return await self.batcher.call(method, params)
+        return await self.request(method, params)
+
+    async def request(self, method: str, params: dict):
+        """
+        Отправить запрос к методу API в обход батчинга.
+        Ошибки сети и временные ошибки API повторяются по правилам :attr:`retry`.
+
+        :raises CircuitOpenError: метод временно отключен после серии ошибок
+        """
+        retry = self.retry
+        breaker = retry.breaker(method)
+        probe = breaker.check(method) if breaker is not None else False
+        try:
+            return await self._request_with_retry(method, params, breaker)
+        finally:
+            if probe:
+                breaker.release()
+
+    async def _request_with_retry(self, method: str, params: dict, breaker):
+        retry = self.retry
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                result = await self._request(method, params)
+            except Exception as e:
+                result = e
+
+            base_delay = retry.base_delay(result)
+            if base_delay is None:
+                if isinstance(result, BaseException):
+                    raise result
+                if breaker is not None:
+                    breaker.success()
+                return result
+
+            if attempt >= retry.max_attempts:
+                retry.gave_up += 1
+                if breaker is not None:
+                    breaker.failure()
+                if isinstance(result, BaseException):
+                    raise result
+                return result
+
+            retry.retries += 1
+            delay = retry.backoff(base_delay, attempt)
+            logging.warning(
+                "Retrying %s in %.2fs (attempt %s): %s",
+                method, delay, attempt, result.get('error') if isinstance(result, dict) else repr(result)
+            )
+            if self.limiter is not None and get_error_code(result) in RATE_LIMIT_ERRORS:
+                # Замедляем все запросы ключа, повтор дождётся своей очереди в ограничителе
+                self.limiter.pause(delay)
+            else:
+                await asyncio.sleep(delay)
+
+    async def _request(self, method: str, params: dict):
         url = "https://api.vk.com/method/" + method
-        params['access_token'] = self.token
-        params['v'] = self.v
-        async with self.session.post(url, params=params, proxy=self.proxy) as response:
-            return await response.json()
+        # Значения кодируются так же, как в execute, чтобы вызов не зависел от батчинга
+        data = normalize_params(params)
+        data['v'] = self.v
+
+        if self.pool is None:
+            await self.limiter.acquire()
+            return await self._post(url, data, self.token)
+
+        state = await self.pool.acquire()
+        response = await self._post(url, data, state.token)
+        if self.pool.report(state, response) and self.pool.healthy:
+            # Ключ исключён из работы, а другие доступны: повторяем вызов один раз другим ключом
+            state = await self.pool.acquire()
+            response = await self._post(url, data, state.token)
+            self.pool.report(state, response)
+        return response
+
+    async def _post(self, url: str, data: dict, token: str):
+        data['access_token'] = token
+        async with self.session.post(url, data=data, proxy=self.proxy) as response:
+            if response.status >= 500:
+                response.raise_for_status()
+            return self.codec.loads(await response.read())
 
     async def send(self, url: str, params: dict, wait: int = 25):
-        async with self.session.get(url, params=params, proxy=self.proxy, timeout=wait + 10) as response:
-            response = await response.json()
+        session = self.session_factory.longpoll_session
+        timeout = aiohttp.ClientTimeout(total=wait + 10)
+        async with session.get(url, params=params, proxy=self.proxy, timeout=timeout) as response:
+            response = self.codec.loads(await response.read())
         return response
 
     async def close(self):
-        await self.session.close()
+        await asyncio.gather(self.users.close(), self.groups.close())
+        if self.batcher is not None:
+            await self.batcher.close()
+        if self.owns_session_factory:
+            await self.session_factory.close()
@@ -3,8 +3,8 @@ import logging
 
 from config import Config
 
-from core.bot.bot_events import VkBotEvent
 from core.bot.bot_longpool import VkBotLongPoll
+from core.runner import LongPollRunner
 from core.vk_api import VkApi
 from examples.hello_world.dispatcher import dispatcher
 
@@ -21,12 +21,8 @@ async def main():
         vk,
         group_id=config.group_id
     )
-    await server.update_longpoll_server()
-    while True:
-        events: list[VkBotEvent] = await server.get_events()
-        for event in events:
-            event.vk = vk
-            await dispatcher.propagate_event(event.type, event)
+    runner = LongPollRunner(dispatcher, vk)
+    await runner.run(server)
 
 
 if __name__ == "__main__":
@@ -6,12 +6,21 @@ from core.keyboards.keyboards import VkKeyboard, VkKeyboardColor
 
 router = Router()
 
+# Клавиатуры не меняются между событиями: собираем и сериализуем их один раз
+hello_keyboard = VkKeyboard(inline=True)
+hello_keyboard.add_callback_button("Test", VkKeyboardColor.POSITIVE, payload={"hello": "world"})
+hello_keyboard = hello_keyboard.freeze()
+
+choice_keyboard = VkKeyboard(inline=True)
+choice_keyboard.add_callback_button("Test1", VkKeyboardColor.POSITIVE, payload={"key": "pos"})
+choice_keyboard.add_callback_button("Test2", VkKeyboardColor.NEGATIVE, payload={"key": "neg"})
+choice_keyboard.add_callback_button("Test3", VkKeyboardColor.PRIMARY, payload={"key": "pri"})
+choice_keyboard = choice_keyboard.freeze()
+
 
 @router.message()
 async def handle_message(event: VkBotMessageEvent, *args, **kwargs):
-    kb = VkKeyboard(inline=True)
-    kb.add_callback_button("Test", VkKeyboardColor.POSITIVE, payload={"hello": "world"})
-    await event.answer(f"Hello, {event.message.text}", keyboard=kb)
+    await event.answer(f"Hello, {event.message.text}", keyboard=hello_keyboard)
 
 
 @router.callback_query(F.payload.get("key") == "pri")
@@ -29,8 +38,4 @@ async def handle_callback_pri(event: VkBotCallbackEvent, *args, **kwargs):
 @router.callback_query()
 async def handle_callback(event: VkBotEvent, *args, **kwargs):
     await event.event_answer()
-    kb = VkKeyboard(inline=True)
-    kb.add_callback_button("Test1", VkKeyboardColor.POSITIVE, payload={"key": "pos"})
-    kb.add_callback_button("Test2", VkKeyboardColor.NEGATIVE, payload={"key": "neg"})
-    kb.add_callback_button("Test3", VkKeyboardColor.PRIMARY, payload={"key": "pri"})
-    await event.answer(f"Нажата кнопка {event}", keyboard=kb)
+    await event.answer(f"Нажата кнопка {event}", keyboard=choice_keyboard)
@@ -0,0 +1,66 @@
+import asyncio
+
+import pytest
+
+from core.bot.bot_events import VkBotMessageEvent
+from core.handlers.execution import cpu_bound, shutdown_executors
+from core.handlers.handler import HandlerObject
+from core.handlers.router import Router
+from core.vk_api import VkApi
+
+
+@cpu_bound
+def count_words(event):
+    return len(event['object']['message']['text'].split())
+
+
+@cpu_bound
+def is_long(event):
+    return len(event['object']['message']['text'].split()) > 2
+
+
+def make_event(text):
+    event = VkBotMessageEvent({
+        'type': 'message_new',
+        'group_id': 1,
+        'object': {'message': {'peer_id': 1, 'text': text}},
+    })
+    # VkApi держит HTTP-сессии и не сериализуется - в процесс он попасть не должен
+    event.vk = VkApi('token')
+    return event
+
+
+@pytest.fixture(autouse=True)
+def executors():
+    yield
+    shutdown_executors()
+
+
+def test_process_handler_runs_in_pool():
+    handler = HandlerObject(count_words)
+
+    result = asyncio.run(handler.call(make_event('one two three'), handler=handler))
+
+    assert result == 3
+
+
+def test_process_filter_dispatch():
+    router = Router()
+    handled = []
+
+    @router.message(is_long)
+    async def long_message(event):
+        handled.append(event.message.text)
+
+    async def dispatch():
+        await router.propagate_event('message_new', make_event('a b'))
+        await router.propagate_event('message_new', make_event('a b c'))
+
+    asyncio.run(dispatch())
+
+    assert handled == ['a b c']
+
+
+def test_process_rejects_unpicklable_callback():
+    with pytest.raises(TypeError, match='PROCESS'):
+        HandlerObject(cpu_bound(lambda event: event))
@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+
+from core.retry import CircuitOpenError, RetryPolicy
+from core.vk_api import VkApi
+
+
+def make_vk(reset_timeout=0.05):
+    return VkApi('token', retry=RetryPolicy(max_attempts=1, failure_threshold=1, reset_timeout=reset_timeout))
+
+
+async def open_circuit(vk, method):
+    async def server_error(method, params):
+        return {'error': {'error_code': 10}}
+
+    vk._request = server_error
+    await vk.request(method, {})
+    with pytest.raises(CircuitOpenError):
+        await vk.request(method, {})
+    await asyncio.sleep(vk.retry.reset_timeout)
+
+
+def test_circuit_recovers_after_cancelled_probe():
+    async def scenario():
+        vk = make_vk()
+        await open_circuit(vk, 'users.get')
+
+        async def hang(method, params):
+            await asyncio.sleep(3600)
+
+        vk._request = hang
+        probe = asyncio.create_task(vk.request('users.get', {}))
+        await asyncio.sleep(0)
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+
+        async def ok(method, params):
+            return {'response': 1}
+
+        vk._request = ok
+        assert await vk.request('users.get', {}) == {'response': 1}
+        assert vk.retry.breakers['users.get'].state == 'closed'
+
+    asyncio.run(scenario())
+
+
+def test_circuit_recovers_after_non_retryable_probe_error():
+    async def scenario():
+        vk = make_vk()
+        await open_circuit(vk, 'users.get')
+
+        async def broken(method, params):
+            raise RuntimeError('broken')
+
+        vk._request = broken
+        with pytest.raises(RuntimeError):
+            await vk.request('users.get', {})
+
+        async def ok(method, params):
+            return {'response': 1}
+
+        vk._request = ok
+        assert await vk.request('users.get', {}) == {'response': 1}
+
+    asyncio.run(scenario())
+
+
+def test_circuit_rejects_concurrent_calls_during_probe():
+    async def scenario():
+        vk = make_vk()
+        await open_circuit(vk, 'users.get')
+
+        async def slow(method, params):
+            await asyncio.sleep(0.01)
+            return {'response': 1}
+
+        vk._request = slow
+        probe = asyncio.create_task(vk.request('users.get', {}))
+        await asyncio.sleep(0)
+        with pytest.raises(CircuitOpenError):
+            await vk.request('users.get', {})
+        assert await probe == {'response': 1}
+
+    asyncio.run(scenario())
@@ -0,0 +1,168 @@
+import asyncio
+
+from magic_filter import F
+
+from core.bot.bot_events import VkBotMessageEvent
+from core.handlers.responce import ResponseStatus
+from core.handlers.router import Router
+from core.user.user_events import Event, VkEventType
+
+
+def make_event(text, peer_id=1, payload=None):
+    message = {'peer_id': peer_id, 'text': text}
+    if payload is not None:
+        message['payload'] = payload
+    return VkBotMessageEvent({'type': 'message_new', 'group_id': 1, 'object': {'message': message}})
+
+
+def dispatch(router, *events):
+    async def run():
+        return [await router.propagate_event('message_new', event) for event in events]
+
+    return asyncio.run(run())
+
+
+def make_handler(handled, name, result=None):
+    async def handler(event):
+        handled.append(name)
+        if isinstance(result, Exception):
+            raise result
+
+    return handler
+
+
+def test_nested_routers_order():
+    root, first, nested, second = Router(), Router(), Router(), Router()
+    root.include_routers(first, second)
+    first.include_router(nested)
+    handled = []
+
+    second.message(F.message.text == 'a')(make_handler(handled, 'second'))
+    nested.message(F.message.text == 'a')(make_handler(handled, 'nested'))
+    nested.message()(make_handler(handled, 'nested-any'))
+    root.message(F.message.text == 'root')(make_handler(handled, 'root'))
+
+    assert dispatch(root, make_event('a'), make_event('b'), make_event('root')) == [ResponseStatus.HANDLED] * 3
+    assert handled == ['nested', 'nested-any', 'root']
+
+
+def test_root_filter_context_is_scoped_to_subtree():
+    root, guarded, child, sibling = Router(), Router(), Router(), Router()
+    root.include_routers(guarded, sibling)
+    guarded.include_router(child)
+    received = []
+
+    async def allow(event):
+        if event.message.text == 'deny':
+            return False
+        return {'role': 'admin'}
+
+    guarded.message.filter(allow)
+
+    @child.message(F.message.text == 'child')
+    async def child_handler(event, role):
+        received.append(('child', role))
+
+    @sibling.message()
+    async def sibling_handler(event, role=None):
+        received.append(('sibling', role))
+
+    dispatch(root, make_event('child'), make_event('other'), make_event('deny'))
+
+    assert received == [('child', 'admin'), ('sibling', None), ('sibling', None)]
+
+
+def test_rejected_skips_subtree_only():
+    root, failing, nested, sibling = Router(), Router(), Router(), Router()
+    root.include_routers(failing, sibling)
+    failing.include_router(nested)
+    handled = []
+
+    failing.message()(make_handler(handled, 'failing', RuntimeError('boom')))
+    nested.message()(make_handler(handled, 'nested'))
+    sibling.message()(make_handler(handled, 'sibling'))
+
+    assert dispatch(root, make_event('a')) == [ResponseStatus.HANDLED]
+    assert handled == ['failing', 'sibling']
+
+
+def test_rejected_in_root_is_unhandled():
+    root = Router()
+    root.message()(make_handler([], 'root', RuntimeError('boom')))
+
+    assert dispatch(root, make_event('a')) == [ResponseStatus.UNHANDLED]
+
+
+def test_changes_after_compile_invalidate_table():
+    root, child = Router(), Router()
+    root.include_router(child)
+    root.compile()
+    handled = []
+
+    assert dispatch(root, make_event('a')) == [ResponseStatus.UNHANDLED]
+
+    child.message()(make_handler(handled, 'child'))
+    assert dispatch(root, make_event('a')) == [ResponseStatus.HANDLED]
+
+    late = Router()
+    root.message(F.message.text == 'late')(make_handler(handled, 'root'))
+    child.include_router(late)
+    late.message.filter(F.message.text == 'never')
+
+    assert dispatch(root, make_event('late'), make_event('b')) == [ResponseStatus.HANDLED] * 2
+    assert handled == ['child', 'root', 'child']
+
+
+def test_index_keeps_registration_order():
+    router = Router()
+    handled = []
+
+    router.message(F.message.text == 'a', F.message.peer_id == 2)(make_handler(handled, 'a-peer-2'))
+    router.message(F.message.text.startswith('a'))(make_handler(handled, 'starts-with-a'))
+    router.message(F.message.text == 'a')(make_handler(handled, 'a'))
+    router.message(F.message.text == 'b')(make_handler(handled, 'b'))
+    router.message(F.message.peer_id == 3)(make_handler(handled, 'peer-3'))
+
+    dispatch(
+        router,
+        make_event('a', peer_id=2),
+        make_event('a', peer_id=1),
+        make_event('b', peer_id=3),
+        make_event('c', peer_id=3),
+        make_event('c', peer_id=1),
+    )
+
+    assert handled == ['a-peer-2', 'starts-with-a', 'b', 'peer-3']
+
+
+def test_index_equality_to_none():
+    router = Router()
+    handled = []
+
+    router.message(F.message.payload == None)(make_handler(handled, 'no-payload'))  # noqa: E711
+    router.message()(make_handler(handled, 'any'))
+
+    dispatch(router, make_event('a'), make_event('a', payload='{}'))
+
+    assert handled == ['no-payload', 'any']
+
+
+def test_user_longpoll_events():
+    router, child = Router(), Router()
+    router.include_router(child)
+    handled = []
+
+    @child.user_message_new(F.text == 'hi')
+    async def user_message(event):
+        handled.append((event.peer_id, event.text))
+
+    @router.message()
+    async def bot_message(event):
+        handled.append('bot')
+
+    event = Event([VkEventType.MESSAGE_NEW, 1, 0, 100, 0, 'hi', {}, {}])
+
+    assert asyncio.run(router.propagate_event(event.type, event)) == ResponseStatus.HANDLED
+    assert handled == [(100, 'hi')]
+    assert router.resolve_used_update_types() == ['message_new']
+